@@ -1,2 +1,6 @@
 from .base_minimax import BaseMinimax
 from .base_minimax_mlp import BaseMinimaxMLP
+from .mcts import MCTS
+from .solver import EndgameSolver
+from .stats import SearchStats
+from .transposition import TranspositionTable
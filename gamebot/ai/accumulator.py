@@ -0,0 +1,36 @@
+import numpy as np
+
+from gamebot.games import StateWrapper
+
+
+class AccumulatorState(StateWrapper):
+    """Wrap a state implementing the in-place protocol to keep the first layer of a MLP up to date.
+
+    The input of the MLP is `list(state)` and a move only changes a few of its values, given by
+    `feature_changes(move)` of the state. So the pre-activation of the first layer (the
+    accumulator) is updated by adding the matching weight columns when a move is pushed. The
+    accumulators of the states of the search stack are kept, popping a move costs nothing.
+    The MLP should not change while the state is in use, its precision included.
+    """
+
+    def __init__(self, state, mlp):
+        super().__init__(state)
+        weights, biases = mlp.first_layer()
+        self._columns = np.ascontiguousarray(weights.T)  # The weights of each input, as rows
+        self._accumulators = [np.dot(weights, np.array(list(state))) + biases]
+
+    @property
+    def accumulator(self):
+        """Return the pre-activation of the first layer of the MLP for the current state."""
+        return self._accumulators[-1]
+
+    def push(self, move):
+        accumulator = self._accumulators[-1]
+        for index, delta in self.state.feature_changes(move):
+            accumulator = accumulator + delta * self._columns[index]
+        self.state.push(move)
+        self._accumulators.append(accumulator)
+
+    def pop(self):
+        self.state.pop()
+        self._accumulators.pop()
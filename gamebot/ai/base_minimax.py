@@ -1,58 +1,568 @@
+import math
+import time
+from collections import OrderedDict
+
 from gamebot.genetics import BaseAlgorithm
+from gamebot.games import StateStack, StateWrapper
+from .parallel import RootPool
+from .stats import InstrumentedState
+from .transposition import EXACT, LOWER, UPPER
 from abc import ABC, abstractmethod
 
 
+class _SearchAborted(Exception):
+    """Raised inside the search when its time or node budget is spent."""
+
+
 class BaseMinimax(BaseAlgorithm, ABC):
     """An implementation of minimax with alpha beta pruning.
 
     It is designed to run with a BaseGameEvaluator as evaluator.
     The only abstract methods are the state evaluation method and the evaluator property
-    that should be implemented for any concrete subclass."""
+    that should be implemented for any concrete subclass.
+
+    The search is a negamax with a full alpha beta window. Principal variation search,
+    aspiration windows and late move reductions can be toggled on each instance.
+    Subclasses can define `state_scores(states)`, returning the `state_score` of each state of
+    a list at once: with `batch_frontier`, the children of the nodes at depth 1 are then scored
+    together.
+    With `processes` greater than 1, the moves of the root are searched by a pool of worker
+    processes, which gives the same result as the serial search as long as the transposition
+    table and late move reductions are disabled (each worker has its own table).
+    """
+
+    state_scores = None
+
+    # Attributes changing the result of a search, part of the key of the move memo
+    memo_settings = (
+        "move_ordering", "pvs", "aspiration_window", "late_move_reduction", "batch_frontier",
+        "opening_book", "tablebase", "endgame_solver",
+    )
 
     def __init__(self):
         self._score = 0
         self._max_depth = (
             3  # A depth of 0 means that no branch of the tree is evaluated
         )
+        # A TranspositionTable shared by the searches, None to disable it
+        self.transposition_table = None
+        # Default budgets of `run`, in seconds and in nodes. None means no limit.
+        self.time_budget = None
+        self.node_budget = None
+
+        # Sort the moves with killer moves, history scores and the priors of the game
+        self.move_ordering = True
+        # Search all the moves but the first one with a null window, again if they are better
+        self.pvs = True
+        # Half width of the window around the previous score used by each deepening iteration,
+        # None to always search with a full window
+        self.aspiration_window = None
+        # Search the late moves one ply shallower (two from the fifth move) unless they look
+        # better. It saves a lot of nodes but the result may differ from a full depth search.
+        self.late_move_reduction = False
+        # Score the children of the nodes at depth 1 together with `state_scores`, if it is defined.
+        # It evaluates more leaves per second but the leaves after a cutoff are scored too.
+        self.batch_frontier = False
+        # Number of processes searching the root moves, 1 to search in the current process
+        self.processes = 1
+        self._pool = None
+        # A threading.Event cancelling the search when it is set, for instance from another thread
+        self.stop_event = None
+        # An EndgameSolver used instead of the search when few cells are left, None to disable it
+        self.endgame_solver = None
+        # A tablebase of the game, looked up before the solver, None to disable it
+        self.tablebase = None
+        # An opening book, looked up before anything else, None to disable it
+        self.opening_book = None
+        # A SearchStats filled by each search, None to disable the instrumentation
+        self.stats = None
+        # Number of results of `run` remembered by position, depth and `memo_settings`, 0 to disable
+        # the memo. The search is deterministic, so the memo gives the move of a fresh search as
+        # long as the parameters do not change. It is not used with a time budget or a
+        # transposition table, whose content changes the result.
+        self.move_memo_size = 0
+        self._move_memo = OrderedDict()
+        self.memo_lookups = 0
+        self.memo_hits = 0
+
+        self.nodes = 0  # Number of nodes visited by the last search
+        self.principal_variation = []  # Best line found by the last search
+        self.best_score = None  # Score of the best move found by the last search
+        self.depth_reached = 0  # Depth of the last completed iteration of the last search
+
+    def run(self, input_state, time_budget=None, node_budget=None):
+        """Take a game state as input and return a move uid.
 
-    def run(self, input_state):
-        """Take a game state as input and return a move uid."""
+        Without budget, the search goes down to `max_depth`. With a time budget (in seconds) or a
+        node budget, the search is deepened one ply at a time until the budget is spent and the
+        best move of the last completed depth is returned, whatever `max_depth` is. The budgets
+        default to the `time_budget` and `node_budget` attributes.
+
+        With an `endgame_solver`, states with few empty cells are solved exactly first. If it
+        finishes within the budget, its move is returned and `best_score` is 1e9 for a win, 0 for
+        a tie and -1e9 for a loss. Otherwise the usual search runs with the budget left.
+        A `tablebase`, an object whose `probe(state)` returns the (value, move) tuple of the state
+        or None, is looked up the same way before the solver. Before all, an `opening_book` whose
+        `probe(state)` returns a (score, move) tuple or None gives the move of known positions.
+
+        With `move_memo_size`, the results are remembered and a search already done is not done
+        again (see `memo_hits` and `memo_lookups`).
+
+        When `stop_event` is set, the search stops as if its budget was spent. Without budget, no
+        depth is completed and None is returned.
+
+        The moves are played and undone in place on the given state during the search, it is
+        back to its original content when the search ends.
+        """
+
+        if not input_state.supports_push:
+            input_state = StateStack(input_state)
+        if time_budget is None:
+            time_budget = self.time_budget
+        if node_budget is None:
+            node_budget = self.node_budget
+
+        memo_key = None
+        if (
+            self.move_memo_size
+            and time_budget is None
+            and self.stop_event is None
+            and self.transposition_table is None
+        ):
+            settings = tuple(getattr(self, name) for name in self.memo_settings)
+            memo_key = (input_state.position_key, self._max_depth, node_budget, settings)
+            self.memo_lookups += 1
+            result = self._move_memo.get(memo_key)
+            if result is not None:
+                self._move_memo.move_to_end(memo_key)
+                self.memo_hits += 1
+                move, self.best_score, principal_variation, self.depth_reached = result
+                self.principal_variation = list(principal_variation)
+                self.nodes = 0
+                return move
+
+        stats = self.stats
+        if stats is None:
+            move = self._run(input_state, time_budget, node_budget)
+        else:
+            stats.reset()
+            start = time.perf_counter()
+            try:
+                move = self._run(input_state, time_budget, node_budget)
+            finally:
+                stats.total_time = time.perf_counter() - start
+                if stats.callback is not None:
+                    stats.callback(stats.as_dict())
+
+        if memo_key is not None and move is not None:
+            self._move_memo[memo_key] = (move, self.best_score, tuple(self.principal_variation), self.depth_reached)
+            if len(self._move_memo) > self.move_memo_size:
+                self._move_memo.popitem(last=False)
+        return move
+
+    def _run(self, input_state, time_budget, node_budget):
+        if self.opening_book is not None:
+            entry = self.opening_book.probe(input_state)
+            if entry is not None:
+                self.nodes = 0
+                self.best_score, move = entry
+                self.principal_variation = [move]
+                return move
+
+        if self.transposition_table is not None:
+            self.transposition_table.new_search()
 
         self._player = input_state.player
+        self.nodes = 0
+        self.principal_variation = []
+        self.best_score = None
+        self._killers = []  # Two moves per ply that recently caused a cutoff
+        self._history = ({}, {})  # Score of each move of each player, by the cutoffs it caused
+        deadline = None if time_budget is None else time.monotonic() + time_budget
+
+        solved = None
+        if self.tablebase is not None:
+            solved = self.tablebase.probe(input_state)
+        solver = self.endgame_solver
+        if (
+            solved is None
+            and solver is not None
+            and input_state.terminal_status() is None
+            and input_state.empty_cells <= solver.max_empty_cells
+        ):
+            solved = solver.solve(input_state, deadline, node_budget, self.stop_event)
+            self.nodes += solver.nodes
+        if solved is not None:
+            value, move = solved
+            self.best_score = value * 1e9
+            self.principal_variation = [move]
+            self.depth_reached = input_state.empty_cells
+            return move
+
+        input_state = self.search_state(input_state)
+        if self.stats is not None:
+            input_state = InstrumentedState(input_state, self.stats)
+
+        if time_budget is None and node_budget is None:
+            self._deadline = self._node_limit = None
+            self._next_check = float("inf") if self.stop_event is None else 0
+            try:
+                self._search(input_state, self._max_depth)
+            except _SearchAborted:
+                self.depth_reached = 0
+                return None
+            self.depth_reached = self._max_depth
+            return self._bestmove
+
+        self._deadline = deadline
+        self._node_limit = node_budget
+
+        # The first depth is always completed to have a move to return
+        self._next_check = float("inf")
+        self._search(input_state, 1)
+        bestmove, best_score = self._bestmove, self.best_score
+        depth = self.depth_reached = 1
+
+        # Stop when the budget is spent or when the search does not depend on the depth anymore
+        while self._horizon_reached:
+            depth += 1
+            try:
+                self._check_budget()
+                self._search(input_state, depth)
+            except _SearchAborted:
+                break
+            bestmove, best_score = self._bestmove, self.best_score
+            self.depth_reached = depth
+
+        self.best_score = best_score
+        return bestmove
+
+    def _search(self, state, depth):
+        """Search the given state down to depth, update the best move and principal variation."""
+        nodes_start = self.nodes
+        self._horizon_reached = False
+        self._previous_pv = self.principal_variation
+        self._pv = [()] * (depth + 1)  # _pv[ply] is the best line found from the node at ply
+        while len(self._killers) <= depth:
+            self._killers.append([None, None])
+
+        alpha, beta = float("-inf"), float("inf")
+        previous = self.best_score
+        if self.aspiration_window is not None and previous is not None and abs(previous) < 1e8:
+            alpha, beta = previous - self.aspiration_window, previous + self.aspiration_window
+
         self._bestmove = None
-        self._alphabeta(input_state, self._max_depth, float("-inf"))
+        self._follow_pv = bool(self._previous_pv)
+        search = self._alphabeta if self.processes <= 1 else self._parallel_root
+        score = search(state, depth, alpha, beta)
+        if score <= alpha or score >= beta:  # Out of the aspiration window, search again
+            self._bestmove = None
+            self._follow_pv = bool(self._previous_pv)
+            score = search(state, depth, float("-inf"), float("inf"))
+
+        self.best_score = score
+        self.principal_variation = list(self._pv[0])
+        if self.stats is not None:
+            self.stats.nodes_per_iteration[depth] = self.nodes - nodes_start
+
+    def _parallel_root(self, state, depth, alpha, beta):
+        """Search the root like `_alphabeta` does, with the moves shared among the worker processes."""
+        if state.terminal_status() is not None:
+            return self._alphabeta(state, depth, alpha, beta)
 
-        return self._bestmove
+        if self._pool is not None and self._pool.processes != self.processes:
+            self.close()
+        if self._pool is None:
+            self._pool = RootPool(self, self.processes)
 
-    def _alphabeta(self, state, depth, bound):
-        """Minimax with alpha beta pruning. Return the score of the most valuable move.
+        # Same order as the serial search, the ties are broken by it
+        moves = state.legal_moves()
+        hash_move = None
+        if self.transposition_table is not None:
+            entry = self.transposition_table.probe(state.position_key, depth)
+            if entry is not None:
+                hash_move = entry[3]
+        if self.move_ordering:
+            self.order_moves(state, moves, 0, hash_move)
+        elif hash_move in moves:
+            moves.remove(hash_move)
+            moves.insert(0, hash_move)
+        if self._previous_pv and self._previous_pv[0] in moves:
+            moves.remove(self._previous_pv[0])
+            moves.insert(0, self._previous_pv[0])
 
-        The move is stored in the instance variable `bestmove`. We used the negamax variant."""
+        # The budget does not apply to the first depth, which is always completed
+        budgeted = self._next_check != float("inf")
+        options = {
+            "move_ordering": self.move_ordering,
+            "pvs": self.pvs,
+            "late_move_reduction": self.late_move_reduction,
+            "_deadline": self._deadline if budgeted else None,
+            "_node_limit": max(self._node_limit - self.nodes, 1) if budgeted and self._node_limit else None,
+        }
+        while isinstance(state, StateWrapper):  # The workers wrap the state with `search_state`
+            state = state.state
+        results = self._pool.search(state, moves, depth, alpha, beta, options)
+        if results is None:
+            raise _SearchAborted()
+
+        best_score = float("-inf")
+        for move, (score, pv, nodes, horizon_reached) in zip(moves, results):
+            self.nodes += nodes
+            self._horizon_reached = self._horizon_reached or horizon_reached
+            if score > best_score:
+                best_score = score
+                self._bestmove = move
+                self._pv[0] = (move,) + pv
+        return best_score
+
+    def _search_root_move(self, state, move, depth, alpha, beta):
+        """Search a single move of the root state, in a worker process of the parallel search.
+
+        Return the score, the principal variation after the move, the number of nodes and whether
+        the horizon was reached, or None if the budget is spent.
+        """
+        self.nodes = 0
+        self._next_check = 0 if self._deadline is not None or self._node_limit is not None else float("inf")
+        self._horizon_reached = False
+        self._follow_pv = False
+        self._pv = [()] * (depth + 1)
+        self._killers = [[None, None] for _ in range(depth + 1)]
+        self._history = ({}, {})
+
+        state = self.search_state(state)
+        state.push(move)
+        try:
+            score = -self._alphabeta(state, depth - 1, -beta, -alpha, 1)
+        except _SearchAborted:
+            return None
+        finally:
+            state.pop()
+        return score, self._pv[1], self.nodes, self._horizon_reached
+
+    def close(self):
+        """Stop the worker processes of the parallel search, if any."""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_pool"] = None  # Processes are not copied, the copy starts its own pool
+        state["stop_event"] = None
+        return state
+
+    def _check_budget(self):
+        """Raise _SearchAborted if the time or node budget is spent."""
+        if self._node_limit is not None and self.nodes >= self._node_limit:
+            raise _SearchAborted()
+        if self._deadline is not None and time.monotonic() >= self._deadline:
+            raise _SearchAborted()
+        if self.stop_event is not None and self.stop_event.is_set():
+            raise _SearchAborted()
+
+        self._next_check = self.nodes + 256  # Avoid reading the clock at every node
+        if self._node_limit is not None:
+            self._next_check = min(self._next_check, self._node_limit)
+
+    def _alphabeta(self, state, depth, alpha, beta, ply=0):
+        """Negamax with alpha beta pruning. Return the score of the state for the player to move.
+
+        The score is exact if it lies strictly between alpha and beta, otherwise it is an upper
+        bound (below alpha) or a lower bound (above beta) of the real score.
+        The best move of the root is stored in the instance variable `bestmove`.
+        The state should implement the in-place protocol of BaseGameState."""
+
+        self.nodes += 1
+        if self.nodes >= self._next_check:
+            self._check_budget()
+        if self.stats is not None:
+            self.stats._node(ply)
+
+        self._pv[ply] = ()
 
         # Handle final cases
-        if state.has_won(state.player):
+        status = state.terminal_status()
+        if status is not None and status != -1:
+            if status == state.player:
+                return 1e9 + depth  # Win as early as possible
             return -1e9 - depth  # Even if it is a loose, loose as far as possible
-        if state.has_won(state.next_player):
-            return 1e9 + depth  # Win as early as possible
         if depth == 0:
-            return self.state_score(state)
-        if state.is_tie():
+            self._horizon_reached = True
+            # `state_score` has always been maximized by the player who moved to the state
+            if self.stats is not None:
+                return -self.stats._score(self, state)
+            return -self.state_score(state)
+        if status == -1:
             return 0
 
-        next_states = state.possible_next_states()
+        moves = state.legal_moves()
+        hash_move = None
+
+        tt = self.transposition_table
+        if tt is not None:
+            key = state.position_key
+            entry = tt.probe(key, depth)
+            if entry is not None:
+                tt_depth, tt_bound, tt_score, hash_move = entry
+                if self.stats is not None:
+                    self.stats.tt_hits += 1
+                if tt_depth >= depth and ply != 0 and (
+                    tt_bound == EXACT
+                    or (tt_bound == LOWER and tt_score >= beta)
+                    or (tt_bound == UPPER and tt_score <= alpha)
+                ):
+                    if self.stats is not None:
+                        self.stats.tt_cutoffs += 1
+                    if abs(tt_score) < 1e8:  # The stored search may have stopped at its depth
+                        self._horizon_reached = True
+                    return tt_score
+
+        if self.move_ordering:
+            self.order_moves(state, moves, ply, hash_move)
+        elif hash_move in moves:  # Search the best move of the previous search first
+            moves.remove(hash_move)
+            moves.insert(0, hash_move)
+
+        # Start with the principal variation of the previous search, while we are on it
+        if self._follow_pv:
+            if ply < len(self._previous_pv) and self._previous_pv[ply] in moves:
+                moves.remove(self._previous_pv[ply])
+                moves.insert(0, self._previous_pv[ply])
+            else:
+                self._follow_pv = False
+
+        alpha_start = alpha
+        best_score = float("-inf")
+        best = None
+
+        # The children are leaves, score them all at once when the subclass can
+        frontier = None
+        if depth == 1 and self.batch_frontier and self.state_scores is not None:
+            frontier = self._score_children(state)
+
+        for i, move in enumerate(moves):
+            if frontier is not None:
+                score = self._frontier_child(frontier[move], ply + 1)
+            else:
+                score = self._search_child(state, move, i, depth, alpha, beta, ply)
+            self._follow_pv = False
+
+            if score > best_score:
+                if ply == 0:  # Top level node, update best move
+                    self._bestmove = move
+                best_score = score
+                best = move
+                self._pv[ply] = (move,) + self._pv[ply + 1]
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        if self.stats is not None:
+                            self.stats._cutoff(i)
+                        if self.move_ordering:
+                            killers = self._killers[ply]
+                            if killers[0] != move:
+                                killers[0], killers[1] = move, killers[0]
+                            history = self._history[state.player]
+                            history[move] = history.get(move, 0) + depth * depth
+                        if tt is not None:
+                            tt.store(key, depth, LOWER, best_score, best)
+                        return best_score
+
+        if tt is not None:
+            tt.store(key, depth, EXACT if best_score > alpha_start else UPPER, best_score, best)
+        return best_score
+
+    def _search_child(self, state, move, i, depth, alpha, beta, ply):
+        """Return the score of the i-th move of the node, searched with principal variation search."""
+        state.push(move)
+        try:
+            if i == 0 or not self.pvs:
+                return -self._alphabeta(state, depth - 1, -beta, -alpha, ply + 1)
+
+            # Null window search: only tell whether the move is better than alpha
+            reduction = 0
+            if self.late_move_reduction and i >= 2 and depth >= 3:
+                reduction = 2 if i >= 4 and depth >= 5 else 1
+            null_beta = math.nextafter(alpha, math.inf)
+            score = -self._alphabeta(state, depth - 1 - reduction, -null_beta, -alpha, ply + 1)
+            if score > alpha and (reduction or score < beta):
+                score = -self._alphabeta(state, depth - 1, -beta, -alpha, ply + 1)
+            return score
+        finally:
+            state.pop()
+
+    def _score_children(self, state):
+        """Return, for each move of the state, the score of the child for the player to move and
+        whether it is a leaf. The leaves are scored by a single call to `state_scores`."""
+        children = list(state.possible_next_states())
+        leaves = [child for child in children if child.terminal_status() in (None, -1)]
+        if self.stats is not None:
+            start = time.perf_counter()
+        scores = iter(self.state_scores(leaves) if leaves else ())
+        if self.stats is not None:
+            self.stats.leaf_evaluations += len(leaves)
+            self.stats.score_time += time.perf_counter() - start
+
+        frontier = {}
+        for child in children:
+            status = child.terminal_status()
+            if status is None or status == -1:
+                frontier[child.last_move] = (float(next(scores)), True)
+            else:  # Won by the player who moved, as in `_alphabeta`
+                frontier[child.last_move] = (1e9 if status != child.player else -1e9, False)
+        return frontier
+
+    def _frontier_child(self, child, ply):
+        """Count the visit of a child scored by `_score_children` and return its score."""
+        self.nodes += 1
+        if self.nodes >= self._next_check:
+            self._check_budget()
+        if self.stats is not None:
+            self.stats._node(ply)
+        self._pv[ply] = ()
+
+        score, leaf = child
+        if leaf:
+            self._horizon_reached = True
+        return score
+
+    def search_state(self, state):
+        """Return the state on which the search plays the moves, the given one by default.
+
+        Subclasses can override it to wrap the state, for instance to maintain incrementally what
+        their `state_score` needs. The wrapper should implement the in-place protocol.
+        """
+        return state
+
+    def order_moves(self, state, moves, ply, hash_move=None):
+        """Sort in place the list of moves of the state, from the most to the least promising.
+
+        The best move stored in the transposition table comes first, then the killer moves of
+        the ply, then the other moves by history score and static prior of the game (see
+        `BaseGameState.move_priors`). Subclasses can override it to plug their own ordering.
+        """
+        history = self._history[state.player]
+        priors = state.move_priors
+        killers = self._killers[ply]
 
-        score = float("-inf")
+        def priority(move):
+            if move == hash_move:
+                return float("inf")
+            if move == killers[0]:
+                return 1e15
+            if move == killers[1]:
+                return 1e14
+            return history.get(move, 0) + (priors[move] if priors else 0)
 
-        for s in next_states:
-            _score = self._alphabeta(s, depth - 1, score)
-            if _score > score:
-                if depth == self._max_depth:  # Top level node, update best move
-                    self._bestmove = s.last_move
-                score = _score
-            if -score <= bound:
-                return -score
+        moves.sort(key=priority, reverse=True)
 
-        return -score
+    def _parameters_changed(self):
+        """Drop the search results that depend on the parameters, to call when they change."""
+        if self.transposition_table is not None:
+            self.transposition_table.clear()
+        self._move_memo.clear()
+        self.close()  # The workers hold a copy of the old parameters
 
     @abstractmethod
     def state_score(self, state):
@@ -1,5 +1,6 @@
 from abc import ABC
 import numpy as np
+from .accumulator import AccumulatorState
 from .base_minimax import BaseMinimax
 from .mlp import MLP
 
@@ -9,47 +10,92 @@ class BaseMinimaxMLP(BaseMinimax, ABC):
 
     It does nothing more, except making the MLP parameters (weights and bias) be able to be
     transfered throught the parameters property.
+
+    When the game gives the `feature_changes` of its moves, the first layer of the MLP is updated
+    incrementally as the search plays the moves (see AccumulatorState), unless `incremental` is
+    False.
     """
 
+    memo_settings = BaseMinimax.memo_settings + ("incremental",)
+
     def __init__(self, shape, weights=None):
         """Initialize the class with an MLP of the given shape.
 
-        The weights of the MLP can me loaded from file, if a filepath is provided, or
-        directly loaded as in.
+        The weights of the MLP can me loaded from file, if a filepath is provided, from a genome
+        of a GenomeFile, if a (filepath, index) tuple is provided, or directly loaded as in
+        (see `MLP.load`).
         """
         super().__init__()
+        self.incremental = True
         if weights is not None:
-            self.mlp = MLP(shape, initialize=False)
-            if isinstance(weights, str):
-                params = np.load(weights, allow_pickle=True)
-                self.parameters = params
-            else:
-                self.parameters = weights
+            self.mlp = MLP.load(shape, weights)
         else:
             self.mlp = MLP(shape)
 
+    def search_state(self, state):
+        if self.incremental and state.supports_feature_changes:
+            return AccumulatorState(state, self.mlp)
+        return state
+
     def state_score(self, state):
+        if isinstance(state, AccumulatorState):
+            return self.mlp.forward_propagation_accumulated(state.accumulator)[0]
         input_state = np.array(list(state))
-        return self.mlp.forward_propagation(input_state)
+        return self.mlp.forward_propagation(input_state)[0]
+
+    def state_scores(self, states):
+        """Return the scores of the given states, computed by a single pass of the MLP."""
+        inputs = np.array([list(state) for state in states])
+        return self.mlp.forward_propagation_batch(inputs)[:, 0]
+
+    @property
+    def precision(self):
+        """Return the precision used to evaluate the MLP (see `MLP.set_precision`)."""
+        return self.mlp.precision
+
+    @precision.setter
+    def precision(self, precision):
+        self.mlp.set_precision(precision)
+        self._parameters_changed()
+
+    def calibrate_precision(self, states, precisions=("int8", "int16", "float32"), min_agreement=1.0):
+        """Set the first of the precisions whose searches choose the same moves as the float64 one.
+
+        The algorithm is run on each of the benchmark states, in float64 then in each precision
+        until the ratio of moves matching the float64 ones is at least `min_agreement`. If none
+        agrees enough, the precision is left to float64. Return the ratio of each precision tried.
+        """
+        self.precision = "float64"
+        expected = [self.run(state) for state in states]
+
+        agreements = {}
+        for precision in precisions:
+            self.precision = precision
+            agreements[precision] = np.mean([self.run(state) == move for state, move in zip(states, expected)])
+            if agreements[precision] >= min_agreement:
+                return agreements
+
+        self.precision = "float64"
+        return agreements
+
+    def fit(self, states, targets, **options):
+        """Fit the MLP so that `state_score` gives the targets of the states, return the loss of each epoch.
+
+        The targets are the scores of the states for the player who moved to them, as `state_score`,
+        for instance search scores or game outcomes. The options are the ones of `MLP.fit`.
+        """
+        inputs = np.array([list(state) for state in states])
+        losses = self.mlp.fit(inputs, targets, **options)
+        self._parameters_changed()
+        return losses
 
     @property
     def parameters(self):
         """Return the MLP parameters in a numpy 1D array."""
-        params = []
-        for layer in self.mlp.layers:
-            params.extend(layer[0].ravel())
-            params.extend(layer[1].ravel())
-
-        return np.array(params)
+        return self.mlp.parameters
 
     @parameters.setter
     def parameters(self, parameters):
         """Set the MLP parameters from the given 1D array."""
-        pcount = 0
-        for i in range(len(self.mlp.shape) - 1):
-            shape = (self.mlp.shape[i + 1], self.mlp.shape[i])
-            weights = np.reshape(parameters[pcount:pcount + shape[0] * shape[1]], shape)
-            pcount += shape[0] * shape[1]
-            biases = np.reshape(parameters[pcount:pcount + shape[0]], shape[0])
-            pcount += shape[0]
-            self.mlp.layers[i] = (weights, biases)
+        self.mlp.parameters = parameters
+        self._parameters_changed()
@@ -0,0 +1,178 @@
+import pathlib
+
+import numpy as np
+
+_MAGIC = b"GBDATA01"
+_HEADER = len(_MAGIC) + 8  # The magic and the size of the encoded states
+
+
+def record_dtype(input_size):
+    """Return the numpy dtype of the records of states encoded by `input_size` values.
+
+    A record holds the state encoded as `list(state)`, the player to move, the score of the search
+    for that player (nan if unknown) and the outcome of the game for them: 1 for a win, 0 for a
+    tie and -1 for a loss. The targets of `BaseMinimaxMLP.fit` are the opposite of the score or
+    outcome, since `state_score` is the score for the player who moved to the state.
+    """
+    return np.dtype([("state", "i1", (input_size,)), ("player", "u1"), ("score", "<f4"), ("outcome", "i1")])
+
+
+def game_records(positions, winner):
+    """Yield the (state, player, score, outcome) record of each position of a finished game.
+
+    The positions are (encoded state, player, score) tuples, the winner is the player who won
+    or -1 for a tie.
+    """
+    for encoded, player, score in positions:
+        outcome = 0 if winner == -1 else (1 if winner == player else -1)
+        yield encoded, player, score, outcome
+
+
+def self_play(Engine, player1, player2, games=1, time_budget=None, node_budget=None):
+    """Play games between the algorithms with a new Engine each, and yield the records of the positions."""
+    for _ in range(games):
+        engine = Engine()
+        positions = []
+        while not engine.is_over():
+            player = player1 if engine.current_player == 0 else player2
+            move = player.run(engine.state, time_budget=time_budget, node_budget=node_budget)
+            positions.append(_position(engine.state, player))
+            if not engine.play(move):
+                raise ValueError("This is an invalid move, it should not happen")
+        yield from game_records(positions, engine.get_winner())
+
+
+def _position(state, algorithm):
+    """Return the (encoded state, player, score) of a state searched by the algorithm."""
+    score = getattr(algorithm, "best_score", None)
+    return list(state), state.player, np.nan if score is None else score
+
+
+class ShardWriter:
+    """Append records to the shards of a dataset directory, `shard_size` records per shard.
+
+    Each shard is a file holding a small header and the records, see `record_dtype`. The records
+    are only appended, a new shard is started when the last one is full. Opening a directory
+    again goes on with its last shard, dropping a record written in part.
+    """
+
+    def __init__(self, directory, input_size, shard_size=2**16):
+        self.directory = pathlib.Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.dtype = record_dtype(input_size)
+        self.input_size = input_size
+        self.shard_size = shard_size
+
+        shards = sorted(self.directory.glob("shard-*.bin"))
+        self._index = len(shards) - 1 if shards else 0
+        self._count = 0
+        self._file = None
+        if shards:
+            self._count = _shard_length(shards[-1], input_size)
+            with open(shards[-1], "r+b") as f:
+                f.truncate(_HEADER + self._count * self.dtype.itemsize)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _open_shard(self):
+        path = self.directory / f"shard-{self._index:05d}.bin"
+        if path.exists():
+            self._file = open(path, "ab")
+            return
+        self._file = open(path, "wb")
+        self._file.write(_MAGIC)
+        self._file.write(np.uint64(self.input_size).astype("<u8").tobytes())
+
+    def write(self, records):
+        """Append the records, an iterable of (state, player, score, outcome) tuples or a record array."""
+        if not isinstance(records, np.ndarray):
+            records = list(records)
+        records = np.asarray(records, dtype=self.dtype)
+        while len(records):
+            if self._count == self.shard_size:
+                self.close()
+                self._index += 1
+                self._count = 0
+            if self._file is None:
+                self._open_shard()
+            chunk, records = records[:self.shard_size - self._count], records[self.shard_size - self._count:]
+            self._file.write(chunk.tobytes())
+            self._count += len(chunk)
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def _shard_length(path, input_size):
+    return (path.stat().st_size - _HEADER) // record_dtype(input_size).itemsize
+
+
+class GameRecorder:
+    """Collect the positions of a game, then write their records to a ShardWriter once it ends.
+
+    It is given to the `fight_function` of the games, which calls `record` before each move and
+    `end_game` with the winner.
+    """
+
+    def __init__(self, writer):
+        self.writer = writer
+        self._positions = []
+
+    def record(self, state, algorithm):
+        """Record the state, searched by the algorithm which is about to play its move."""
+        self._positions.append(_position(state, algorithm))
+
+    def end_game(self, winner):
+        self.writer.write(game_records(self._positions, winner))
+        self._positions = []
+
+
+class ShardReader:
+    """Read the records of a dataset directory written by ShardWriter, memory-mapped shard by shard."""
+
+    def __init__(self, directory):
+        self._shards = []
+        for path in sorted(pathlib.Path(directory).glob("shard-*.bin")):
+            with open(path, "rb") as f:
+                if f.read(len(_MAGIC)) != _MAGIC:
+                    raise ValueError(f"{path} is not a dataset shard")
+                input_size = int(np.frombuffer(f.read(8), dtype="<u8")[0])
+            length = _shard_length(path, input_size)
+            if length:
+                dtype = record_dtype(input_size)
+                self._shards.append(np.memmap(path, dtype=dtype, mode="r", offset=_HEADER, shape=(length,)))
+
+    def __len__(self):
+        return sum(len(shard) for shard in self._shards)
+
+    def minibatches(self, batch_size, mixed_shards=4, seed=None):
+        """Yield shuffled minibatches of records, a pass over the whole dataset.
+
+        The shards are taken in a random order, `mixed_shards` at a time, and the records of these
+        shards are shuffled together. Only the records of the current batch are read, so memory
+        does not depend on the size of the dataset.
+        """
+        rng = np.random.default_rng(seed)
+        order = rng.permutation(len(self._shards))
+        for start in range(0, len(order), mixed_shards):
+            shards = [self._shards[i] for i in order[start:start + mixed_shards]]
+            owners = np.concatenate([np.full(len(shard), i) for i, shard in enumerate(shards)])
+            indexes = np.concatenate([np.arange(len(shard)) for shard in shards])
+            permutation = rng.permutation(len(indexes))
+            for batch_start in range(0, len(permutation), batch_size):
+                batch = permutation[batch_start:batch_start + batch_size]
+                parts = []
+                for i, shard in enumerate(shards):
+                    selected = np.sort(indexes[batch][owners[batch] == i])
+                    if len(selected):
+                        parts.append(shard[selected])
+                records = np.concatenate(parts)
+                yield records[rng.permutation(len(records))]
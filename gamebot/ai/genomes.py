@@ -0,0 +1,65 @@
+import numpy as np
+
+_MAGIC = b"GENOMES1"
+_HEADER = len(_MAGIC) + 16  # The magic, the number of genomes and of parameters by genome
+
+# Genome files opened by the process, by path, so their bots share the same mapping
+_opened = {}
+
+
+def write_genomes(path, genomes, labels=None):
+    """Write the genomes, 1D arrays of parameters of the same size, to a genome file.
+
+    The labels are integers identifying the genomes in the index of the file, for instance their
+    generation. They default to the position of each genome.
+    """
+    genomes = np.asarray(genomes, dtype="<f8")
+    if genomes.ndim != 2:
+        raise ValueError("The genomes should have the same number of parameters")
+    labels = np.arange(len(genomes)) if labels is None else labels
+
+    with open(path, "wb") as f:
+        f.write(_MAGIC)
+        f.write(np.array(genomes.shape, dtype="<u8").tobytes())
+        f.write(np.asarray(labels, dtype="<u8").tobytes())
+        f.write(genomes.tobytes())
+
+
+class GenomeFile:
+    """Many genomes of the same size, memory-mapped read-only from a file written by `write_genomes`.
+
+    The file holds, after its header, the index of the labels of the genomes, then the parameters
+    of each genome as a float64 row. Nothing is unpickled, and the rows given by indexing the file
+    are views on the mapping, so all the bots loading them (see `MLP.load`), even in different
+    processes, share the pages of the file.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError(f"{path} is not a genome file")
+            count, size = (int(n) for n in np.frombuffer(f.read(16), dtype="<u8"))
+
+        self.path = str(path)
+        self.labels = np.memmap(path, dtype="<u8", mode="r", offset=_HEADER, shape=(count,))
+        self._genomes = np.memmap(path, dtype="<f8", mode="r", offset=_HEADER + 8 * count, shape=(count, size))
+
+    @classmethod
+    def open(cls, path):
+        """Return the GenomeFile of the path, opened once by process."""
+        path = str(path)
+        if path not in _opened:
+            _opened[path] = cls(path)
+        return _opened[path]
+
+    def __len__(self):
+        return len(self._genomes)
+
+    def __getitem__(self, i):
+        """Return the read-only parameters of the i-th genome."""
+        return self._genomes[i]
+
+    def find(self, label):
+        """Return the position of the first genome with the given label, or None."""
+        positions = np.flatnonzero(self.labels == label)
+        return int(positions[0]) if len(positions) else None
@@ -0,0 +1,213 @@
+import math
+import time
+
+import numpy as np
+
+from gamebot.genetics import BaseAlgorithm
+from gamebot.games import StateStack
+from .mlp import MLP
+
+
+class MCTS(BaseAlgorithm):
+    """Monte Carlo tree search guided by a MLP evaluating the states.
+
+    The children are selected with the PUCT rule: Q + exploration * P * sqrt(N) / (1 + n).
+    The prior P of a move is proportional to 1 + its static prior given by the game (see
+    `BaseGameState.move_priors`). The value of a leaf is the tanh of the MLP output for the
+    player who moved to it, as `BaseMinimaxMLP.state_score`. Leaves are collected by batches
+    of `batch_size`, made different by a virtual loss, and evaluated with a single call to the
+    MLP.
+
+    The nodes are stored in numpy arrays indexed by node, the children of a node being
+    contiguous. The tree is kept from a `run()` to another and searched again from the new
+    state if it is the previous root or one of its children or grandchildren.
+    """
+
+    # Numpy arrays of the node store and their type
+    _NODE_ARRAYS = (
+        ("_first_child", np.int32),  # Index of the first child, -1 for a leaf
+        ("_child_count", np.int32),
+        ("_move", np.int32),  # Move leading to the node
+        ("_prior", np.float64),
+        ("_visits", np.int32),
+        ("_value_sum", np.float64),  # Sum of the values for the player who moved to the node
+        ("_keys", np.uint64),  # Position key, set once the node is visited
+    )
+
+    def __init__(self, shape, weights=None):
+        """Initialize the search with an MLP of the given shape, loaded as in BaseMinimaxMLP."""
+        self._score = 0
+        if weights is not None:
+            self.mlp = MLP.load(shape, weights)
+        else:
+            self.mlp = MLP(shape)
+
+        # Default budgets of `run`, the number of simulations is used when there is no time budget
+        self.iterations = 800
+        self.time_budget = None
+        self.batch_size = 8  # Number of leaves evaluated together by the MLP
+        self.exploration = 1.5
+        self.reuse_tree = True
+        self.max_nodes = 2**21  # The tree is cleared before a search when it is bigger
+
+        self.simulations = 0  # Number of simulations of the last search
+        self.best_score = None  # Mean value of the chosen move in the last search
+        self._clear_tree()
+
+    def _clear_tree(self, capacity=1024):
+        for name, dtype in self._NODE_ARRAYS:
+            setattr(self, name, np.zeros(capacity, dtype=dtype))
+        self._size = 0
+        self._root = None
+
+    def _new_nodes(self, count):
+        """Allocate count contiguous leaves and return the index of the first one."""
+        first = self._size
+        self._size += count
+        if self._size > len(self._visits):
+            capacity = max(2 * len(self._visits), self._size)
+            for name, _ in self._NODE_ARRAYS:
+                array = getattr(self, name)
+                setattr(self, name, np.concatenate((array, np.zeros(capacity - len(array), array.dtype))))
+
+        nodes = slice(first, self._size)
+        self._first_child[nodes] = -1
+        self._child_count[nodes] = 0
+        self._visits[nodes] = 0
+        self._value_sum[nodes] = 0
+        return first
+
+    def run(self, input_state, time_budget=None, iterations=None):
+        """Take a game state as input and return the most visited move.
+
+        Without time budget, `iterations` simulations are run. With a time budget (in seconds),
+        simulations run until it is spent, or until `iterations` if it is given too. The budgets
+        default to the `time_budget` and `iterations` attributes.
+        """
+        if input_state.terminal_status() is not None:
+            return None
+        if not input_state.supports_push:
+            input_state = StateStack(input_state)
+        if time_budget is None:
+            time_budget = self.time_budget
+        if iterations is None and time_budget is None:
+            iterations = self.iterations
+        deadline = None if time_budget is None else time.monotonic() + time_budget
+
+        key = input_state.position_key
+        root = self._find_root(key) if self.reuse_tree and self._size <= self.max_nodes else None
+        if root is None:
+            self._clear_tree()
+            root = self._new_nodes(1)
+            self._keys[root] = key
+        self._root = root
+
+        self.simulations = 0
+        while iterations is None or self.simulations < iterations:
+            if deadline is not None and time.monotonic() >= deadline and self.simulations:
+                break
+            count = self.batch_size if iterations is None else min(self.batch_size, iterations - self.simulations)
+            self.simulations += self._simulate(input_state, count)
+
+        children = slice(self._first_child[root], self._first_child[root] + self._child_count[root])
+        best = self._first_child[root] + int(np.argmax(self._visits[children]))
+        self.best_score = self._value_sum[best] / max(self._visits[best], 1)
+        return int(self._move[best])
+
+    def _find_root(self, key):
+        """Return the node of the previous tree with the given key, down to the grandchildren."""
+        if self._root is None:
+            return None
+
+        nodes = [self._root]
+        for _ in range(3):
+            children = []
+            for node in nodes:
+                if self._visits[node] > 0 and self._keys[node] == key:
+                    return node
+                first = self._first_child[node]
+                children.extend(range(first, first + self._child_count[node]))
+            nodes = children
+        return None
+
+    def _select_child(self, node):
+        first = self._first_child[node]
+        children = slice(first, first + self._child_count[node])
+        visits = self._visits[children]
+        q = self._value_sum[children] / np.maximum(visits, 1)
+        u = self.exploration * math.sqrt(self._visits[node] + 1) * self._prior[children] / (1 + visits)
+        return first + int(np.argmax(q + u))
+
+    def _simulate(self, state, count):
+        """Run up to count simulations from the root state, return the number of simulations done.
+
+        The leaves found are evaluated together at the end. A virtual loss is given to the nodes
+        on the path of a leaf, so the next simulations explore other paths.
+        """
+        pending = []  # Leaves to evaluate, with their path, input and moves
+        pending_leaves = set()
+        terminals = []  # Paths of terminal leaves, with their value
+
+        for _ in range(count):
+            node = self._root
+            path = [node]
+            while self._first_child[node] >= 0:
+                node = self._select_child(node)
+                state.push(int(self._move[node]))
+                path.append(node)
+
+            if node in pending_leaves:  # Already waiting for its evaluation, stop the batch
+                for _ in path[1:]:
+                    state.pop()
+                break
+
+            self._visits[path] += 1
+            self._value_sum[path] -= 1  # Virtual loss
+            self._keys[node] = state.position_key
+            status = state.terminal_status()
+            if status is not None:
+                # Only the player who moved to the state can have won
+                terminals.append((path, 0.0 if status == -1 else 1.0))
+            else:
+                pending.append((path, list(state), state.legal_moves(), state.move_priors))
+                pending_leaves.add(node)
+            for _ in path[1:]:
+                state.pop()
+
+        if pending:
+            inputs = np.array([features for _, features, _, _ in pending])
+            values = np.tanh(self.mlp.forward_propagation_batch(inputs)[:, 0])
+            for (path, _, moves, priors), value in zip(pending, values):
+                self._expand(path[-1], moves, priors)
+                terminals.append((path, float(value)))
+
+        for path, value in terminals:
+            for node in reversed(path):
+                self._value_sum[node] += value + 1  # Remove the virtual loss
+                value = -value
+
+        return len(terminals)
+
+    def _expand(self, node, moves, priors):
+        first = self._new_nodes(len(moves))
+        children = slice(first, first + len(moves))
+        self._move[children] = moves
+        prior = np.ones(len(moves)) if not priors else 1 + np.array([priors[move] for move in moves], dtype=float)
+        self._prior[children] = prior / prior.sum()
+        self._first_child[node] = first
+        self._child_count[node] = len(moves)
+
+    @property
+    def score(self):
+        return self._score
+
+    @property
+    def parameters(self):
+        """Return the MLP parameters in a numpy 1D array."""
+        return self.mlp.parameters
+
+    @parameters.setter
+    def parameters(self, parameters):
+        """Set the MLP parameters from the given 1D array, the tree of the previous search is dropped."""
+        self.mlp.parameters = parameters
+        self._clear_tree()
@@ -1,13 +1,66 @@
+import pathlib
+
 import numpy as np
 
+from .genomes import GenomeFile
+
+# Inference precisions of a MLP, and the largest quantized weight of the integer ones
+PRECISIONS = ("float64", "float32", "int16", "int8")
+_QUANTIZED_MAX = {"int16": 2**15 - 1, "int8": 2**7 - 1}
+
+
+def _parameter_count(shape):
+    """Return the number of weights and biases of a MLP of the given shape."""
+    return sum((shape[i] + 1) * shape[i + 1] for i in range(len(shape) - 1))
+
+
+def _layer_views(buffer, shape):
+    """Return the (weights, biases) of each layer as views on the last axis of the parameter buffer.
+
+    The parameters are ordered as in MLP.parameters: the weights of the first layer row by row, its
+    biases, then the next layers.
+    """
+    layers = []
+    lead, pcount = buffer.shape[:-1], 0
+    for i in range(len(shape) - 1):
+        size = shape[i + 1] * shape[i]
+        weights = buffer[..., pcount:pcount + size].reshape(lead + (shape[i + 1], shape[i]))
+        pcount += size
+        biases = buffer[..., pcount:pcount + shape[i + 1]]
+        pcount += shape[i + 1]
+        layers.append((weights, biases))
+    return layers
+
+
+class _Layers(list):
+    """The layers of a MLP, setting a layer copies its weights and biases into the parameter buffer."""
+
+    def __init__(self, layers, mlp=None):
+        super().__init__(layers)
+        self._mlp = mlp
+
+    def __setitem__(self, i, layer):
+        if self._mlp is not None:
+            self._mlp._set_layer(i, layer)
+            return
+        weights, biases = self[i]
+        weights[...] = layer[0]
+        biases[...] = layer[1]
+
 
 class MLP():
     """A class implementing a multi layer perceptron.
 
-    This class only gives an API for the MLP as a big function, the training being done by
-    a genetic algorithm.
+    This class mostly gives an API for the MLP as a big function, the training being done by
+    a genetic algorithm. It can also be fitted to labelled inputs by gradient descent (see `fit`).
     Its intent is to be plugged in the `state_score` function of a minimax class. As a
     consequence, it is a regression network with one neuron in the output layer.
+
+    All the parameters are stored in a single contiguous array, the weights and biases of the
+    layers being views on it. Getting or setting the parameters is a single copy, and so is
+    copying the MLP.
+
+    The network is evaluated in float64 by default, see `set_precision` for the others.
     """
 
     def __init__(self, shape, initialize=True):
@@ -19,19 +72,135 @@ class MLP():
             return ValueError("Bad shape for MLP")
 
         self.shape = shape
-        self.layers = []
+        self.precision = "float64"
+        self._inference_layers = None  # The (weights, biases, scale) of each layer below float64
+        self._source = None  # The (path, genome index) of the read-only file shared by the buffer
+        if initialize:
+            self._set_buffer(np.random.uniform(-1, 1, _parameter_count(shape)))
+        else:
+            self._set_buffer(np.zeros(_parameter_count(shape)))
+
+    @classmethod
+    def load(cls, shape, weights):
+        """Return a MLP of the given shape with the given weights.
+
+        The weights are an array of parameters, which is copied, the path of a `.npy` file holding
+        one, or a (path, index) tuple giving a genome of a GenomeFile. The files are memory-mapped
+        read-only, without unpickling anything, and the MLP evaluates their pages in place: the
+        bots loading the same file share a single copy. The parameters are copied on the first
+        change. Pickled MLPs only hold the path of their file and map it again.
+        """
+        mlp = cls(shape, initialize=False)
+        if isinstance(weights, (str, pathlib.Path)):
+            mlp._share(np.load(weights, mmap_mode="r"), (str(weights), None))
+        elif isinstance(weights, tuple):
+            path, index = weights
+            mlp._share(GenomeFile.open(path)[index], (str(path), index))
+        else:
+            mlp.parameters = weights
+        return mlp
+
+    def _share(self, parameters, source):
+        if parameters.dtype != np.float64 or parameters.shape != self._parameters.shape:
+            self.parameters = parameters
+            return
+        self._set_buffer(parameters)
+        self._source = source
 
-        for i in range(len(shape) - 1):
-            if initialize:
-                weights = np.random.uniform(-1, 1, (shape[i + 1], shape[i]))
-                biases = np.random.uniform(-1, 1, shape[i + 1])
-            else:
-                weights = np.zeros((shape[i + 1], shape[i]))
-                biases = np.zeros(shape[i + 1])
-            self.layers.append((weights, biases))
+    def _unshare(self):
+        """Copy the parameters of a shared file, before they are changed."""
+        self._source = None
+        self._set_buffer(np.array(self._parameters))
+
+    def _set_buffer(self, buffer):
+        self._parameters = buffer
+        self.layers = _Layers(_layer_views(buffer, self.shape), self)
+        self._update_inference_layers()
+
+    def _set_layer(self, i, layer):
+        if not self._parameters.flags.writeable:
+            self._unshare()
+        weights, biases = list.__getitem__(self.layers, i)
+        weights[...] = layer[0]
+        biases[...] = layer[1]
+        self._update_inference_layers()
+
+    def __getstate__(self):
+        state = {"shape": self.shape, "precision": self.precision}
+        if self._source is not None:
+            state["_source"] = self._source
+        else:
+            state["_parameters"] = self._parameters
+        return state
+
+    def __setstate__(self, state):
+        self.shape = state["shape"]
+        self.precision = state.get("precision", "float64")
+        self._inference_layers = None
+        self._source = None
+        if "_source" in state:
+            self._set_buffer(np.zeros(_parameter_count(self.shape)))
+            path, index = state["_source"]
+            self._share(np.load(path, mmap_mode="r") if index is None else GenomeFile.open(path)[index], (path, index))
+        else:
+            self._set_buffer(state["_parameters"])
+
+    def set_precision(self, precision):
+        """Set the precision used to evaluate the network, one of PRECISIONS.
+
+        With float32, the weights and biases are evaluated as float32. With int16 and int8, the
+        weights of each layer are quantized to integers with a scale of the layer (the largest
+        absolute weight maps to the largest integer), the biases and activations are float32.
+        The float64 parameters are kept as they are, for the training and `parameters`.
+        """
+        if precision not in PRECISIONS:
+            raise ValueError(f"The precision should be one of {PRECISIONS}")
+        self.precision = precision
+        self._update_inference_layers()
+
+    def _update_inference_layers(self):
+        if self.precision == "float64":
+            self._inference_layers = None
+            return
+
+        self._inference_layers = []
+        for weights, biases in self.layers:
+            if self.precision == "float32":
+                self._inference_layers.append((weights.astype(np.float32), biases.astype(np.float32), None))
+                continue
+            largest = np.abs(weights).max()
+            scale = largest / _QUANTIZED_MAX[self.precision] if largest else 1.0
+            quantized = np.round(weights / scale).astype(self.precision)
+            self._inference_layers.append((quantized, biases.astype(np.float32), np.float32(scale)))
+
+    def first_layer(self):
+        """Return the (weights, biases) of the first layer, as they are evaluated in the current precision."""
+        if self._inference_layers is None:
+            return self.layers[0]
+        weights, biases, scale = self._inference_layers[0]
+        if scale is not None:
+            weights = weights * scale
+        return weights, biases
+
+    def _forward_reduced(self, X, first_layer=0):
+        """Compute the output of the network from the input of the first_layer, in reduced precision."""
+        X = np.asarray(X, dtype=np.float32)
+        last = len(self._inference_layers) - 1
+        for i in range(first_layer, last + 1):
+            weights, biases, scale = self._inference_layers[i]
+            X = np.dot(X, weights.T) if X.ndim == 2 else np.dot(weights, X)
+            if scale is not None:
+                X = X * scale
+            X = X + biases
+            if i < last:
+                X = np.maximum(0, X)  # ReLU activation
+        return X
 
     def forward_propagation(self, X):
         """Compute the output of the network for the given input X."""
+        if self._inference_layers is not None:
+            return self._forward_reduced(X)
+
         for layer in self.layers[:-1]:
             X = np.dot(layer[0], X) + layer[1]
             X = np.maximum(0, X)  # ReLU activation
@@ -40,3 +209,187 @@ class MLP():
         X = np.dot(self.layers[-1][0], X) + self.layers[-1][1]
 
         return X
+
+    def forward_propagation_batch(self, X):
+        """Compute the outputs of the network for the inputs given in the rows of X."""
+        if self._inference_layers is not None:
+            return self._forward_reduced(np.atleast_2d(X))
+
+        for weights, biases in self.layers[:-1]:
+            X = np.maximum(0, np.dot(X, weights.T) + biases)
+
+        return np.dot(X, self.layers[-1][0].T) + self.layers[-1][1]
+
+    def forward_propagation_accumulated(self, accumulator):
+        """Compute the output of the network from the pre-activation of its first layer."""
+        if len(self.layers) == 1:
+            return accumulator
+        if self._inference_layers is not None:
+            return self._forward_reduced(np.maximum(0, accumulator), first_layer=1)
+
+        X = np.maximum(0, accumulator)
+        for weights, biases in self.layers[1:-1]:
+            X = np.maximum(0, np.dot(weights, X) + biases)
+
+        return np.dot(self.layers[-1][0], X) + self.layers[-1][1]
+
+    def gradients(self, X, y):
+        """Return the mean squared error of the outputs for the inputs in the rows of X and its gradient.
+
+        The gradient is a 1D array ordered as `parameters`, computed by backpropagation in float64.
+        """
+        activations = [np.asarray(X, dtype=float)]
+        for weights, biases in self.layers[:-1]:
+            activations.append(np.maximum(0, np.dot(activations[-1], weights.T) + biases))
+        outputs = np.dot(activations[-1], self.layers[-1][0].T) + self.layers[-1][1]
+
+        errors = outputs - np.reshape(y, outputs.shape)
+        gradient = np.zeros_like(self._parameters)
+        delta = 2 * errors / len(errors)
+        for i, (grad_weights, grad_biases) in reversed(list(enumerate(_layer_views(gradient, self.shape)))):
+            grad_weights[...] = np.dot(delta.T, activations[i])
+            grad_biases[...] = delta.sum(axis=0)
+            if i:
+                delta = np.dot(delta, self.layers[i][0]) * (activations[i] > 0)  # ReLU derivative
+
+        return float(np.mean(errors ** 2)), gradient
+
+    def fit(self, X, y, epochs=10, batch_size=32, learning_rate=1e-3, optimizer="adam", seed=None):
+        """Fit the network to the targets y of the inputs in the rows of X, return the loss of each epoch.
+
+        The mean squared error is minimized by minibatch gradient descent, with plain SGD or Adam
+        (beta1 0.9, beta2 0.999). The samples are shuffled at each epoch. The loss of an epoch is the
+        mean of the losses of its minibatches.
+        """
+        if optimizer not in ("sgd", "adam"):
+            raise ValueError("The optimizer should be sgd or adam")
+        if not self._parameters.flags.writeable:
+            self._unshare()
+
+        X, y = np.asarray(X, dtype=float), np.asarray(y, dtype=float).reshape(-1, 1)
+        rng = np.random.default_rng(seed)
+        moment, velocity, step = np.zeros_like(self._parameters), np.zeros_like(self._parameters), 0
+        losses = []
+        for _ in range(epochs):
+            order = rng.permutation(len(X))
+            epoch_losses = []
+            for start in range(0, len(X), batch_size):
+                batch = order[start:start + batch_size]
+                loss, gradient = self.gradients(X[batch], y[batch])
+                epoch_losses.append(loss)
+                if optimizer == "sgd":
+                    self._parameters -= learning_rate * gradient
+                    continue
+                step += 1
+                moment = 0.9 * moment + 0.1 * gradient
+                velocity = 0.999 * velocity + 0.001 * gradient ** 2
+                corrected = moment / (1 - 0.9 ** step)
+                self._parameters -= learning_rate * corrected / (np.sqrt(velocity / (1 - 0.999 ** step)) + 1e-8)
+            losses.append(float(np.mean(epoch_losses)))
+
+        self._update_inference_layers()
+        return losses
+
+    @property
+    def parameters(self):
+        """Return a copy of the weights and biases of all the layers in a numpy 1D array."""
+        return self._parameters.copy()
+
+    @parameters.setter
+    def parameters(self, parameters):
+        """Set the weights and biases of all the layers from the given 1D array."""
+        if not self._parameters.flags.writeable:
+            self._source = None
+            self._set_buffer(np.array(parameters, dtype=float))
+            return
+        self._parameters[:] = parameters
+        self._update_inference_layers()
+
+
+class StackedMLP():
+    """The MLPs of several individuals of the same shape, evaluated all at once.
+
+    The weights and biases of each layer are stacked in arrays whose first axis is the
+    individual, so a single `einsum` or `matmul` per layer evaluates every network. It is
+    meant to score the positions of many games played in lockstep, one network per player.
+    As in MLP, they are views on a single parameter array, with a row per individual.
+    """
+
+    def __init__(self, shape, count, initialize=True):
+        """Initialize count MLPs of the given shape, as MLP does."""
+        if len(shape) < 2 or shape[-1] != 1:
+            raise ValueError("Bad shape for MLP")
+
+        self.shape = tuple(shape)
+        self.count = count
+        if initialize:
+            self._set_buffer(np.random.uniform(-1, 1, (count, _parameter_count(shape))))
+        else:
+            self._set_buffer(np.zeros((count, _parameter_count(shape))))
+
+    def _set_buffer(self, buffer):
+        self._parameters = buffer
+        self.layers = _Layers(_layer_views(buffer, self.shape))
+
+    def __getstate__(self):
+        return {"shape": self.shape, "count": self.count, "_parameters": self._parameters}
+
+    def __setstate__(self, state):
+        self.shape, self.count = state["shape"], state["count"]
+        self._set_buffer(state["_parameters"])
+
+    @classmethod
+    def from_mlps(cls, mlps):
+        """Stack the weights of the given MLPs, which should all have the same shape."""
+        mlps = list(mlps)
+        shape = tuple(mlps[0].shape)
+        if any(tuple(mlp.shape) != shape for mlp in mlps):
+            raise ValueError("The stacked MLPs should have the same shape")
+
+        stacked = cls(shape, len(mlps), initialize=False)
+        stacked.parameters = np.stack([mlp._parameters for mlp in mlps])
+        return stacked
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        """Return the MLP of the i-th individual, its parameters are a view on the stacked ones."""
+        mlp = MLP(self.shape, initialize=False)
+        mlp._set_buffer(self._parameters[i])
+        return mlp
+
+    def forward_propagation(self, X):
+        """Compute the output of each network for its own input, given in the rows of X.
+
+        X has one row per individual, the result has shape (count, 1).
+        """
+        X = np.asarray(X, dtype=float)
+        for weights, biases in self.layers[:-1]:
+            X = np.maximum(0, np.einsum("noi,ni->no", weights, X) + biases)
+
+        weights, biases = self.layers[-1]
+        return np.einsum("noi,ni->no", weights, X) + biases
+
+    def forward_propagation_batch(self, X):
+        """Compute the outputs of every network for a batch of inputs.
+
+        X is either a 2D array whose rows are inputs given to all the networks, or a 3D array
+        holding a batch of inputs for each network. The result has shape (count, batch, 1).
+        """
+        X = np.asarray(X, dtype=float)
+        for weights, biases in self.layers[:-1]:
+            X = np.maximum(0, np.matmul(X, weights.transpose(0, 2, 1)) + biases[:, np.newaxis])
+
+        weights, biases = self.layers[-1]
+        return np.matmul(X, weights.transpose(0, 2, 1)) + biases[:, np.newaxis]
+
+    @property
+    def parameters(self):
+        """Return a copy of the parameters of the networks in a 2D array, a row per individual as MLP.parameters."""
+        return self._parameters.copy()
+
+    @parameters.setter
+    def parameters(self, parameters):
+        """Set the parameters of the networks from the given 2D array, a row per individual."""
+        self._parameters[:] = parameters
@@ -0,0 +1,83 @@
+import copy
+import math
+import multiprocessing
+import pickle
+
+from .transposition import TranspositionTable
+
+# Copy of the algorithm and shared alpha of the current worker process
+_worker = None
+_shared_alpha = None
+
+
+def _init_worker(payload, shared_alpha, table_memory):
+    global _worker, _shared_alpha
+    _worker = pickle.loads(payload)
+    _shared_alpha = shared_alpha
+    if table_memory is not None:
+        _worker.transposition_table = TranspositionTable(table_memory)
+
+
+def _search_move(state, move, depth, alpha, beta, options):
+    """Search one root move in a worker, with the best alpha known by the workers."""
+    for name, value in options.items():
+        setattr(_worker, name, value)
+
+    alpha = max(alpha, _shared_alpha.value)
+    if alpha >= beta:  # Another move already failed high, the root will be searched again
+        return float("-inf"), (), 0, False
+
+    # Moves as good as alpha get an exact score, to break ties in the order of the serial search
+    result = _worker._search_root_move(state, move, depth, math.nextafter(alpha, -math.inf), beta)
+    if result is not None and result[0] > alpha:
+        with _shared_alpha.get_lock():
+            if result[0] > _shared_alpha.value:
+                _shared_alpha.value = result[0]
+    return result
+
+
+class RootPool:
+    """A persistent pool of processes searching the root moves of a BaseMinimax in parallel.
+
+    Each worker gets its own copy of the algorithm (and of its evaluation weights) once, when
+    the pool starts, then only the state and the move to search are sent with each task.
+    The best score found so far is shared between the workers through a lock-protected value.
+    A new pool should be created when the parameters of the algorithm change.
+    """
+
+    def __init__(self, algorithm, processes):
+        worker = copy.copy(algorithm)
+        worker.processes = 1
+        worker.transposition_table = None
+        worker.stats = None
+        table = algorithm.transposition_table
+        table_memory = None if table is None else len(table) * TranspositionTable.ENTRY_SIZE
+
+        self.processes = processes
+        self.alpha = multiprocessing.Value("d", float("-inf"))
+        self._pool = multiprocessing.Pool(
+            processes, initializer=_init_worker, initargs=(pickle.dumps(worker), self.alpha, table_memory)
+        )
+
+    def search(self, state, moves, depth, alpha, beta, options):
+        """Search each move of the root state, return a (score, pv, nodes, horizon) tuple per move.
+
+        The first move is searched alone to get a good alpha for the others (young brothers
+        wait). The scores of the moves that cannot beat the best one are upper bounds.
+        Return None if the budget of the search was spent before the end.
+        """
+        self.alpha.value = alpha
+        first = self._pool.apply(_search_move, (state, moves[0], depth, alpha, beta, options))
+        if first is None:
+            return None
+
+        tasks = [(state, move, depth, alpha, beta, options) for move in moves[1:]]
+        results = [first] + self._pool.starmap(_search_move, tasks, chunksize=1)
+        if None in results:
+            return None
+        return results
+
+    def close(self):
+        """Stop the worker processes."""
+        self._pool.terminate()
+        self._pool.join()
@@ -0,0 +1,126 @@
+import time
+
+
+class _SolverAborted(Exception):
+    """Raised inside the solver when its budget is spent."""
+
+
+class EndgameSolver:
+    """Exact solver for the end of a game, with null window alpha beta searches.
+
+    The game is searched until its end, whatever the depth, and the value of a position is
+    1 if the player to move wins, 0 for a tie and -1 if they loose. The root is solved with
+    the smallest windows possible: once a tie is proven, the other moves are only asked whether
+    they win. The bounds found for each position are cached by position key, they do not depend
+    on any evaluation so they are kept from a solve to another (up to `max_entries`).
+
+    It is used by BaseMinimax (see its `endgame_solver` attribute) once the number of empty
+    cells of the state is at most `max_empty_cells`. The state should implement the in-place
+    protocol of BaseGameState.
+    """
+
+    def __init__(self, max_empty_cells=16, max_entries=2**20):
+        self.max_empty_cells = max_empty_cells
+        self.max_entries = max_entries
+        self._bounds = {}
+        self.nodes = 0  # Number of nodes visited by the last solve
+
+    def __deepcopy__(self, memo):
+        return self  # Copies of an algorithm share the solver, the values do not depend on them
+
+    def solve(self, state, deadline=None, node_limit=None, stop_event=None):
+        """Return the (value, best move) tuple of the state, or None if the budget is spent.
+
+        `deadline` is a time.monotonic() date, `node_limit` a number of nodes and `stop_event`
+        a threading.Event cancelling the search when it is set.
+        """
+        self.nodes = 0
+        self._deadline, self._node_limit, self._stop_event = deadline, node_limit, stop_event
+        self._next_check = 0
+        if len(self._bounds) > self.max_entries:
+            self._bounds.clear()
+
+        best_value, best_move = -2, None
+        try:
+            for move in self._sorted_moves(state):
+                state.push(move)
+                try:
+                    value = -self._negamax(state, -1, -max(best_value, -1))
+                finally:
+                    state.pop()
+                if value > best_value:
+                    best_value, best_move = value, move
+                    if value == 1:
+                        break
+        except _SolverAborted:
+            return None
+        return best_value, best_move
+
+    def _check_budget(self):
+        if self._node_limit is not None and self.nodes >= self._node_limit:
+            raise _SolverAborted()
+        if self._deadline is not None and time.monotonic() >= self._deadline:
+            raise _SolverAborted()
+        if self._stop_event is not None and self._stop_event.is_set():
+            raise _SolverAborted()
+        self._next_check = self.nodes + 1024
+
+    def _sorted_moves(self, state):
+        """Return the legal moves of the state, the winning ones first, then by move prior."""
+        moves = state.legal_moves()
+        priors = state.move_priors
+        if priors:
+            moves.sort(key=lambda move: priors[move], reverse=True)
+
+        for i, move in enumerate(moves):
+            state.push(move)
+            won = state.terminal_status() not in (None, -1)
+            state.pop()
+            if won:
+                moves.insert(0, moves.pop(i))
+                break
+        return moves
+
+    def _negamax(self, state, alpha, beta):
+        """Return the value of the state, exact if it lies strictly between alpha and beta."""
+        self.nodes += 1
+        if self.nodes >= self._next_check:
+            self._check_budget()
+
+        status = state.terminal_status()
+        if status is not None:
+            if status == -1:
+                return 0
+            return 1 if status == state.player else -1
+
+        key = state.position_key
+        lower, upper = self._bounds.get(key, (-1, 1))
+        if lower >= beta or lower == upper:
+            return lower
+        if upper <= alpha:
+            return upper
+        alpha_start, beta_start = max(alpha, lower), min(beta, upper)
+        alpha = alpha_start
+
+        best = -1
+        for move in self._sorted_moves(state):
+            state.push(move)
+            try:
+                value = -self._negamax(state, -beta_start, -alpha)
+            finally:
+                state.pop()
+            if value > best:
+                best = value
+                if best > alpha:
+                    alpha = best
+                    if alpha >= beta_start:
+                        break
+
+        if best <= alpha_start:
+            upper = best
+        elif best >= beta_start:
+            lower = best
+        else:
+            lower = upper = best
+        self._bounds[key] = (lower, upper)
+        return best
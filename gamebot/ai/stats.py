@@ -0,0 +1,128 @@
+import json
+import time
+
+from gamebot.games import StateWrapper
+
+
+class SearchStats:
+    """Counters and timings of a BaseMinimax search, filled when set as its `stats` attribute.
+
+    They are reset at the beginning of each `run()`. At its end, `callback` (if any) is called
+    with `as_dict()`, for instance to stream the stats of a training to a JsonLinesWriter.
+
+    The timings wrap each call to the game state and to `state_score`, so an instrumented search
+    is slower than a normal one, but the proportions are meaningful. Connect4 and tictactoe
+    states detect wins while the moves are pushed, that time is counted as move time.
+    """
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.reset()
+
+    def reset(self):
+        self.nodes_per_ply = []  # Nodes visited at each distance from the root, re-searches included
+        self.nodes_per_iteration = {}  # Nodes visited by each completed depth of the search
+        self.leaf_evaluations = 0  # Calls to state_score
+        self.terminal_hits = 0  # Nodes where the game is over
+        self.cutoffs = 0  # Beta cutoffs
+        self.cutoff_indexes = []  # Number of cutoffs caused by the first, second... move searched
+        self.tt_hits = 0  # Transposition table probes finding the node
+        self.tt_cutoffs = 0  # Of which the stored score was enough to return
+        self.score_time = 0.0  # In seconds, spent in state_score
+        self.move_time = 0.0  # In legal_moves, push and pop
+        self.terminal_time = 0.0  # In terminal_status
+        self.total_time = 0.0
+
+    @property
+    def nodes(self):
+        return sum(self.nodes_per_ply)
+
+    @property
+    def effective_branching_factor(self):
+        """Ratio between the nodes of the last two completed depths, or the depth-th root of the nodes."""
+        iterations = sorted(self.nodes_per_iteration.items())
+        if len(iterations) >= 2 and iterations[-2][1]:
+            return iterations[-1][1] / iterations[-2][1]
+        if iterations:
+            depth, nodes = iterations[-1]
+            return nodes ** (1 / depth)
+        return None
+
+    def as_dict(self):
+        return {
+            "nodes": self.nodes,
+            "nodes_per_ply": self.nodes_per_ply,
+            "nodes_per_iteration": self.nodes_per_iteration,
+            "effective_branching_factor": self.effective_branching_factor,
+            "leaf_evaluations": self.leaf_evaluations,
+            "terminal_hits": self.terminal_hits,
+            "cutoffs": self.cutoffs,
+            "cutoff_indexes": self.cutoff_indexes,
+            "tt_hits": self.tt_hits,
+            "tt_cutoffs": self.tt_cutoffs,
+            "score_time": self.score_time,
+            "move_time": self.move_time,
+            "terminal_time": self.terminal_time,
+            "total_time": self.total_time,
+        }
+
+    def _node(self, ply):
+        while len(self.nodes_per_ply) <= ply:
+            self.nodes_per_ply.append(0)
+        self.nodes_per_ply[ply] += 1
+
+    def _cutoff(self, index):
+        self.cutoffs += 1
+        while len(self.cutoff_indexes) <= index:
+            self.cutoff_indexes.append(0)
+        self.cutoff_indexes[index] += 1
+
+    def _score(self, algorithm, state):
+        self.leaf_evaluations += 1
+        start = time.perf_counter()
+        score = algorithm.state_score(state.state)
+        self.score_time += time.perf_counter() - start
+        return score
+
+
+class JsonLinesWriter:
+    """A SearchStats callback appending the stats of each search as a JSON line to a file."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def __call__(self, stats):
+        with open(self.path, "a") as f:
+            f.write(json.dumps(stats) + "\n")
+
+
+class InstrumentedState(StateWrapper):
+    """Wrap a state implementing the in-place protocol to time its calls and count terminal states."""
+
+    def __init__(self, state, stats):
+        super().__init__(state)
+        self.stats = stats
+
+    def legal_moves(self):
+        start = time.perf_counter()
+        moves = self.state.legal_moves()
+        self.stats.move_time += time.perf_counter() - start
+        return moves
+
+    def push(self, move):
+        start = time.perf_counter()
+        self.state.push(move)
+        self.stats.move_time += time.perf_counter() - start
+
+    def pop(self):
+        start = time.perf_counter()
+        self.state.pop()
+        self.stats.move_time += time.perf_counter() - start
+
+    def terminal_status(self):
+        start = time.perf_counter()
+        status = self.state.terminal_status()
+        self.stats.terminal_time += time.perf_counter() - start
+        if status is not None:
+            self.stats.terminal_hits += 1
+        return status
@@ -0,0 +1,88 @@
+import numpy as np
+
+# Kind of score stored in an entry
+EXACT = 0
+LOWER = 1  # The score is a lower bound of the real score
+UPPER = 2  # The score is an upper bound of the real score
+
+# Scores beyond this value are wins or losses, their distance to the end is stored instead
+_WIN_THRESHOLD = 1e8
+
+
+class TranspositionTable:
+    """A fixed-size hash table caching the results of the search by position key.
+
+    Each entry stores the depth of the search, the kind of bound, the score and the best move
+    found in the position. The table lives in a few contiguous numpy arrays whose size is the
+    largest power of two fitting in the given memory (in bytes).
+
+    When two positions share a slot, the entry searched the deepest is kept, unless it comes
+    from a previous search (see `new_search`), in which case it is always replaced.
+    It can be kept from one `run()` to another, but it should be cleared when the evaluation
+    function changes.
+    """
+
+    ENTRY_SIZE = 20  # Bytes used by one entry: key, score and packed infos
+
+    def __init__(self, memory=2**24):
+        if memory < self.ENTRY_SIZE:
+            raise ValueError("The memory should fit at least one entry")
+
+        size = 1 << ((memory // self.ENTRY_SIZE).bit_length() - 1)
+        self._mask = size - 1
+        self._keys = np.zeros(size, dtype=np.uint64)
+        self._scores = np.zeros(size, dtype=np.float64)
+        # Bits 0-7: depth + 1 (0 for an empty slot), 8-9: bound kind, 10-17: age, 18-31: move + 1
+        self._infos = np.zeros(size, dtype=np.int32)
+        self._age = 0
+
+    def __len__(self):
+        return self._mask + 1
+
+    def clear(self):
+        """Remove all the entries."""
+        self._infos.fill(0)
+
+    def new_search(self):
+        """Mark the current entries as old, so they are replaced first."""
+        self._age = (self._age + 1) & 0xFF
+
+    def probe(self, key, depth):
+        """Return the (depth, bound, score, move) tuple stored for the given key, or None.
+
+        `depth` is the remaining depth of the current node, used to rescale win scores.
+        """
+        i = key & self._mask
+        infos = int(self._infos[i])
+        if not infos or self._keys[i] != key:
+            return None
+
+        score = float(self._scores[i])
+        if score > _WIN_THRESHOLD:
+            score += depth
+        elif score < -_WIN_THRESHOLD:
+            score -= depth
+
+        move = (infos >> 18) - 1
+        return (infos & 0xFF) - 1, (infos >> 8) & 0x3, score, (None if move < 0 else move)
+
+    def store(self, key, depth, bound, score, move):
+        """Store the result of the search of a node at the given remaining depth."""
+        i = key & self._mask
+        infos = int(self._infos[i])
+        if infos and self._keys[i] != key and (infos >> 10) & 0xFF == self._age:
+            if (infos & 0xFF) - 1 > depth:
+                return  # Keep the deepest entry of the current search
+
+        # Win scores depend on the depth of the node, store the distance to the end instead
+        score = float(score)
+        if score > _WIN_THRESHOLD:
+            score -= depth
+        elif score < -_WIN_THRESHOLD:
+            score += depth
+
+        self._keys[i] = key
+        self._scores[i] = score
+        self._infos[i] = (
+            (depth + 1) | bound << 8 | self._age << 10 | (0 if move is None else move + 1) << 18
+        )
@@ -1 +1 @@
-from .base_game_state import BaseGameState
+from .base_game_state import BaseGameState, StateStack, StateWrapper
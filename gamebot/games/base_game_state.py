@@ -6,13 +6,45 @@ class BaseGameState(ABC):
 
     It provides an API to translate the state of a game from its specific representation
     to a more suitable representation for calculation and algorithm.
+
+    A game can also implement the optional in-place protocol (`legal_moves`, `push` and `pop`)
+    and set `supports_push` to True. Search algorithms then play and undo moves on a single
+    state instead of creating a new state for each node.
     """
 
+    supports_push = False
+
+    # True if the game implements `feature_changes`
+    supports_feature_changes = False
+
+    # Static priority of each move uid, the higher the sooner the move is searched. None if the
+    # game has no prior knowledge about its moves.
+    move_priors = None
+
     @abstractmethod
     def possible_next_states(self):
         """Return a generator of possible states after this current state."""
         pass
 
+    def legal_moves(self):
+        """Return the uids of the moves that can be played from the current state."""
+        raise NotImplementedError("This game does not implement the in-place protocol")
+
+    def push(self, move):
+        """Play the given move in place, the state becomes the state after the move."""
+        raise NotImplementedError("This game does not implement the in-place protocol")
+
+    def pop(self):
+        """Undo the last move played with `push`."""
+        raise NotImplementedError("This game does not implement the in-place protocol")
+
+    def feature_changes(self, move):
+        """Return the (index, delta) pairs of the values of `list(self)` changed by playing the move.
+
+        It lets evaluations whose input is the iterator of the state update it incrementally.
+        """
+        raise NotImplementedError("The game does not give the feature changes of its moves")
+
     @abstractmethod
     def is_tie(self):
         """Return True if the state is a tie state."""
@@ -23,6 +55,20 @@ class BaseGameState(ABC):
         """Return True is the given player has won the game on the current state."""
         pass
 
+    def terminal_status(self):
+        """Return the winner of the game, -1 if it is a tie or None if the game is not over.
+
+        Games should override it to compute the status once and cache it on the state, the
+        default implementation goes through `has_won` and `is_tie` at each call.
+        """
+        if self.has_won(0):
+            return 0
+        if self.has_won(1):
+            return 1
+        if self.is_tie():
+            return -1
+        return None
+
     @property
     def last_move(self):
         """Return the move that leads to this current state.
@@ -36,6 +82,20 @@ class BaseGameState(ABC):
         """Return the player that should play the next move."""
         return self._player
 
+    @property
+    def position_key(self):
+        """Return a 64-bit integer identifying the state, used to index transposition tables.
+
+        Games should maintain it incrementally, e.g. with Zobrist hashing. It defaults to the
+        hash of the state.
+        """
+        return hash(self) & 0xFFFFFFFFFFFFFFFF
+
+    @property
+    def empty_cells(self):
+        """Return the number of moves left before the board is full, used by endgame solvers."""
+        raise NotImplementedError("The game does not count its empty cells")
+
     @property
     @abstractmethod
     def next_player(self):
@@ -57,3 +117,129 @@ class BaseGameState(ABC):
     @abstractmethod
     def __hash__(self):
         pass
+
+
+class StateStack(BaseGameState):
+    """Provide the in-place protocol for a state that only implements `possible_next_states`.
+
+    Pushing a move walks down to the matching child state, popping goes back to the parent.
+    The other methods are forwarded to the state on top of the stack.
+    """
+
+    supports_push = True
+
+    def __init__(self, state):
+        self._states = [state]
+        self._children = [None]  # Children of each state of the stack by move, built on demand
+
+    @property
+    def top(self):
+        """Return the current state, i.e. the one on top of the stack."""
+        return self._states[-1]
+
+    def _top_children(self):
+        if self._children[-1] is None:
+            self._children[-1] = {s.last_move: s for s in self.top.possible_next_states()}
+        return self._children[-1]
+
+    def legal_moves(self):
+        return list(self._top_children())
+
+    def push(self, move):
+        self._states.append(self._top_children()[move])
+        self._children.append(None)
+
+    def pop(self):
+        self._states.pop()
+        self._children.pop()
+
+    def possible_next_states(self):
+        return self.top.possible_next_states()
+
+    def is_tie(self):
+        return self.top.is_tie()
+
+    def has_won(self, player):
+        return self.top.has_won(player)
+
+    def terminal_status(self):
+        return self.top.terminal_status()
+
+    @property
+    def last_move(self):
+        return self.top.last_move
+
+    @property
+    def player(self):
+        return self.top.player
+
+    @property
+    def next_player(self):
+        return self.top.next_player
+
+    @property
+    def position_key(self):
+        return self.top.position_key
+
+    @property
+    def empty_cells(self):
+        return self.top.empty_cells
+
+    @property
+    def move_priors(self):
+        return self.top.move_priors
+
+    def __iter__(self):
+        return iter(self.top)
+
+    def __eq__(self, other):
+        if isinstance(other, StateStack):
+            other = other.top
+        return self.top == other
+
+    def __hash__(self):
+        return hash(self.top)
+
+
+class StateWrapper:
+    """Base class of the wrappers of a state implementing the in-place protocol.
+
+    Every call is forwarded to the wrapped `state`, subclasses override the ones they watch.
+    """
+
+    supports_push = True
+
+    def __init__(self, state):
+        self.state = state
+
+    def legal_moves(self):
+        return self.state.legal_moves()
+
+    def push(self, move):
+        self.state.push(move)
+
+    def pop(self):
+        self.state.pop()
+
+    def terminal_status(self):
+        return self.state.terminal_status()
+
+    @property
+    def player(self):
+        return self.state.player
+
+    @property
+    def position_key(self):
+        return self.state.position_key
+
+    @property
+    def move_priors(self):
+        return self.state.move_priors
+
+    def __iter__(self):
+        return iter(self.state)
+
+    def __getattr__(self, name):
+        if name == "state":  # Not set yet, e.g. while unpickling
+            raise AttributeError(name)
+        return getattr(self.state, name)
@@ -1,15 +1,85 @@
-import copy
+import random
 
 import numpy as np
-from scipy.signal import convolve2d
 
 from gamebot.games import BaseGameState
 
+# Bitboard layout: each column uses HEIGHT + 1 bits, the extra bit on top of each column stays
+# empty so that shifts used for alignment detection never wrap from one column to the next.
+#
+#  6 13 20 27 34 41 48
+#  5 12 19 26 33 40 47
+#  4 11 18 25 32 39 46
+#  3 10 17 24 31 38 45
+#  2  9 16 23 30 37 44
+#  1  8 15 22 29 36 43
+#  0  7 14 21 28 35 42
+HEIGHT = 6
+WIDTH = 7
+_STRIDE = HEIGHT + 1
+_CELLS = WIDTH * HEIGHT
+
+# Zobrist keys of a stone of each player on each bit, and of player 1 being the one to move.
+# The generator is seeded so that the keys are the same from one run to another.
+_random = random.Random(4)
+_ZOBRIST = tuple(tuple(_random.getrandbits(64) for _ in range(WIDTH * _STRIDE)) for _ in range(2))
+_ZOBRIST_PLAYER = _random.getrandbits(64)
+
+
+def _cell_bit(row, col):
+    """Return the bit of the cell at `row`, `col` in the board array (row 0 is the top)."""
+    return 1 << (col * _STRIDE + HEIGHT - 1 - row)
+
+
+def _windows_through_cells():
+    """Return, for each bit of the board, the masks of the four cells lines going through it."""
+    windows = []
+    for col in range(WIDTH):
+        for row in range(HEIGHT):
+            for dcol, drow in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                cells = [(col + i * dcol, row + i * drow) for i in range(4)]
+                if all(0 <= c < WIDTH and 0 <= r < HEIGHT for c, r in cells):
+                    windows.append(sum(1 << (c * _STRIDE + r) for c, r in cells))
+
+    return tuple(
+        tuple(w for w in windows if w >> index & 1) for index in range(WIDTH * _STRIDE)
+    )
+
+
+_WINDOWS = _windows_through_cells()
+
+
+def _completes_line(stones, index):
+    """Return True if the stones of the given bitboard form a line through the bit `index`."""
+    for window in _WINDOWS[index]:
+        if stones & window == window:
+            return True
+    return False
+
+
+def _terminal_status(wins, moves):
+    """Return the terminal status, as in `terminal_status`, from the win flags and move count."""
+    if wins:
+        return 0 if wins & 1 else 1
+    if moves == _CELLS:
+        return -1
+    return None
+
+
+def _aligned(stones):
+    """Return True if there are four aligned stones in the given bitboard."""
+    for shift in (1, _STRIDE, _STRIDE - 1, _STRIDE + 1):  # Vertical, horizontal, both diagonals
+        pairs = stones & (stones >> shift)
+        if pairs & (pairs >> (2 * shift)):
+            return True
+    return False
+
+
 class Connect4Engine:
     """The game engine for connect4."""
     def __init__(self):
-        self.dimX = 6
-        self.dimY = 7
+        self.dimX = HEIGHT
+        self.dimY = WIDTH
 
         self.reset()
         self.current_player = 0
@@ -23,14 +93,7 @@ class Connect4Engine:
         return winner is not None
 
     def get_winner(self):
-        if self._state.has_won(0):
-            return 0
-        if self._state.has_won(1):
-            return 1
-        if self._state.is_tie():
-            return -1
-
-        return None
+        return self._state.terminal_status()
 
     def next_turn(self):
         if self.current_player == 0:
@@ -70,44 +133,128 @@ class Connect4State(BaseGameState):
     A move in the board is represented by the column number and the player in a tuple.
 
     The player is either 0 or 1. An empty cell is represented by -1.
+
+    The board is stored as two bitboards: `_position` holds the stones of the player to move
+    and `_mask` all the occupied cells. `_heights` gives the number of stones in each column.
     """
 
+    supports_push = True
+    supports_feature_changes = True
+    move_priors = (0, 1, 2, 3, 2, 1, 0)  # Central columns take part in more lines
+
     def __init__(self, col_played, player, board):
-        self._board = copy.deepcopy(board)
         self._origin_move = col_played
         self._player = player  # Used in the `player` property of the base class
         self._origin_player = self.next_player
 
+        self._position = 0
+        self._mask = 0
+        self._heights = [0] * WIDTH
+        self._moves = 0
+        self._key = _ZOBRIST_PLAYER if player == 1 else 0
+        for row in range(HEIGHT):
+            for col in range(WIDTH):
+                if board[row][col] != -1:
+                    bit = _cell_bit(row, col)
+                    self._mask |= bit
+                    self._heights[col] += 1
+                    self._moves += 1
+                    self._key ^= _ZOBRIST[board[row][col]][bit.bit_length() - 1]
+                    if board[row][col] == player:
+                        self._position |= bit
+
+        # Bit i of `_wins` is set if the player i has four aligned stones
+        self._wins = 0
+        for p in (0, 1):
+            stones = self._position if p == player else self._position ^ self._mask
+            if _aligned(stones):
+                self._wins |= 1 << p
+        self._status = _terminal_status(self._wins, self._moves)
+
+        self._history = []  # Origin move, wins and status before each move played with `push`
+
+    def _play(self, col):
+        """Return the state reached when the player to move drops a stone in `col`."""
+        child = Connect4State.__new__(Connect4State)
+        index = col * _STRIDE + self._heights[col]
+        child._origin_move = col
+        child._player = self._origin_player
+        child._origin_player = self._player
+        # The stones of the opponent become the ones of the player to move
+        child._position = self._position ^ self._mask
+        child._mask = self._mask | (1 << index)
+        child._key = self._key ^ _ZOBRIST[self._player][index] ^ _ZOBRIST_PLAYER
+        child._heights = self._heights[:]
+        child._heights[col] += 1
+        child._moves = self._moves + 1
+        child._history = []
+
+        # Only the stone just played can complete a line, so only the lines through it are checked
+        child._wins = self._wins
+        if not self._wins >> self._player & 1:
+            if _completes_line(child._position ^ child._mask, index):
+                child._wins |= 1 << self._player
+        child._status = _terminal_status(child._wins, child._moves)
+
+        return child
+
     def possible_next_states(self):
-        for col in range(self._board.shape[1]):
-            for row in range(self._board.shape[0] - 1, -1, -1):
-                if self._board[row][col] == -1:
-                    self._board[row][col] = self.player
+        for col in range(WIDTH):
+            if self._heights[col] < HEIGHT:
+                yield self._play(col)
+
+    def legal_moves(self):
+        return [col for col in range(WIDTH) if self._heights[col] < HEIGHT]
+
+    def push(self, col):
+        self._history.append((self._origin_move, self._wins, self._status))
+        index = col * _STRIDE + self._heights[col]
+        self._position ^= self._mask
+        self._mask |= 1 << index
+        self._key ^= _ZOBRIST[self._player][index] ^ _ZOBRIST_PLAYER
+        self._heights[col] += 1
+        self._moves += 1
+        self._origin_move = col
+        self._player, self._origin_player = self._origin_player, self._player
+
+        if not self._wins >> self._origin_player & 1:
+            if _completes_line(self._position ^ self._mask, index):
+                self._wins |= 1 << self._origin_player
+        self._status = _terminal_status(self._wins, self._moves)
 
-                    try:
-                        yield Connect4State(col, self.next_player, self._board)
-                    finally:
-                        self._board[row][col] = -1  # Back to original state
-                    break
+    def pop(self):
+        col = self._origin_move
+        self._origin_move, self._wins, self._status = self._history.pop()
+        self._heights[col] -= 1
+        self._moves -= 1
+        index = col * _STRIDE + self._heights[col]
+        self._mask ^= 1 << index
+        self._position ^= self._mask
+        self._player, self._origin_player = self._origin_player, self._player
+        self._key ^= _ZOBRIST[self._player][index] ^ _ZOBRIST_PLAYER
 
     def is_tie(self):
-        for col in range(self._board.shape[1]):
-            if self._board[0][col] == -1:
-                    return False
-        return not (self.has_won(0) or self.has_won(1))
+        return self._status == -1
 
     def has_won(self, player):
-        horizontal_kernel = np.array([[ 1, 1, 1, 1]])
-        vertical_kernel = np.transpose(horizontal_kernel)
-        diag1_kernel = np.eye(4, dtype=np.uint8)
-        diag2_kernel = np.fliplr(diag1_kernel)
-        detection_kernels = [horizontal_kernel, vertical_kernel, diag1_kernel, diag2_kernel]
+        return bool(self._wins >> player & 1)
 
-        for kernel in detection_kernels:
-            if (convolve2d(self._board == player, kernel, mode="valid") == 4).any():
-                return True
+    def terminal_status(self):
+        return self._status
+
+    @property
+    def position_key(self):
+        return self._key
+
+    @property
+    def empty_cells(self):
+        return _CELLS - self._moves
 
-        return False
+    def feature_changes(self, col):
+        # The player to move changes, and the cell goes from empty (-1) to the player
+        player = self._player
+        row = HEIGHT - 1 - self._heights[col]
+        return ((0, 1 - 2 * player), (1 + row * WIDTH + col, player + 1))
 
     @property
     def next_player(self):
@@ -117,10 +264,22 @@ class Connect4State(BaseGameState):
 
     def __iter__(self):
         yield self.player
-        yield from np.nditer(self._board)
+        for row in range(HEIGHT):
+            for col in range(WIDTH):
+                bit = _cell_bit(row, col)
+                if not self._mask & bit:
+                    yield -1
+                elif self._position & bit:
+                    yield self._player
+                else:
+                    yield self._origin_player
 
     def __eq__(self, other):
-        return np.all(self._board == other._board) and self.player == other.player
+        return (
+            self._position == other._position
+            and self._mask == other._mask
+            and self.player == other.player
+        )
 
     def __hash__(self):
-        return hash(tuple(self))
+        return self._key
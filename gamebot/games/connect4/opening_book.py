@@ -0,0 +1,159 @@
+import multiprocessing
+import os
+import pathlib
+import pickle
+
+import numpy as np
+
+from .engine import Connect4Engine, WIDTH, _STRIDE
+
+_MAGIC = b"C4BOOK01"
+_COLUMN = (1 << _STRIDE) - 1
+
+# Record of the journal of a build, the searched positions are appended to it as they come
+_RECORD = np.dtype([("key", "<u8"), ("score", "<f4"), ("move", "i1")])
+
+
+def _mirror(bits):
+    """Return the bitboard with the columns in reverse order."""
+    mirrored = 0
+    for col in range(WIDTH):
+        mirrored |= (bits >> (col * _STRIDE) & _COLUMN) << ((WIDTH - 1 - col) * _STRIDE)
+    return mirrored
+
+
+def canonical_key(state):
+    """Return the key identifying the position of a Connect4State up to a mirror, and whether it is mirrored.
+
+    `position + mask` is unique for a position since each column has a spare bit on top.
+    The key of a position and of its mirror image is the smallest of both keys.
+    """
+    key = state._position + state._mask
+    mirrored_key = _mirror(key)
+    if mirrored_key < key:
+        return mirrored_key, True
+    return key, False
+
+
+def _positions(plies):
+    """Return the move sequences leading to each position of at most `plies` moves, by canonical key.
+
+    The sequences lead to the orientation of the position that has the canonical key, which is
+    the one searched for the book.
+    """
+    sequences = {}
+    stack = [()]
+    while stack:
+        moves = stack.pop()
+        state = Connect4Engine().state
+        for move in moves:
+            state.push(move)
+        key, mirrored = canonical_key(state)
+        if key in sequences or state.terminal_status() is not None:
+            continue
+        sequences[key] = tuple(WIDTH - 1 - move for move in moves) if mirrored else moves
+        if len(moves) < plies:
+            stack.extend(moves + (move,) for move in state.legal_moves())
+    return sequences
+
+
+# Algorithm of the current worker process of a build
+_worker = None
+
+
+def _init_worker(payload):
+    global _worker
+    _worker = pickle.loads(payload)
+
+
+def _search_position(moves):
+    """Search the position reached by the moves, return its book record."""
+    state = Connect4Engine().state
+    for move in moves:
+        state.push(move)
+    move = _worker.run(state)
+    key, mirrored = canonical_key(state)
+    if mirrored:
+        move = WIDTH - 1 - move
+    return key, _worker.best_score, move
+
+
+def build(algorithm, path, plies=4, processes=1):
+    """Search every position of the first `plies` moves with the algorithm and write the book to path.
+
+    The positions are searched with the settings of the algorithm (depth, budgets...) by a pool of
+    `processes` processes. Each result is appended to a journal (`path` + ".journal") as soon as it
+    comes, so an interrupted build resumes where it stopped when it is called again. The journal is
+    removed once the book is written.
+    """
+    global _worker
+    journal_path = pathlib.Path(str(path) + ".journal")
+    done = set()
+    if journal_path.exists():
+        data = journal_path.read_bytes()
+        records = np.frombuffer(data[:len(data) - len(data) % _RECORD.itemsize], dtype=_RECORD)
+        done.update(int(key) for key in records["key"])
+        with open(journal_path, "r+b") as journal:  # Drop a record written in part
+            journal.truncate(len(records) * _RECORD.itemsize)
+
+    todo = [moves for key, moves in _positions(plies).items() if key not in done]
+    with open(journal_path, "ab") as journal:
+
+        def write(record):
+            journal.write(np.array([record], dtype=_RECORD).tobytes())
+            journal.flush()
+
+        if processes <= 1:
+            _worker = algorithm
+            for moves in todo:
+                write(_search_position(moves))
+        else:
+            with multiprocessing.Pool(processes, _init_worker, (pickle.dumps(algorithm),)) as pool:
+                for record in pool.imap_unordered(_search_position, todo):
+                    write(record)
+
+    records = np.fromfile(journal_path, dtype=_RECORD)
+    records = records[np.argsort(records["key"], kind="stable")]
+    with open(path, "wb") as f:
+        f.write(_MAGIC)
+        f.write(np.uint64(len(records)).astype("<u8").tobytes())
+        f.write(records["key"].tobytes())
+        f.write(records["score"].tobytes())
+        f.write(records["move"].tobytes())
+    os.remove(journal_path)
+
+
+class Connect4OpeningBook:
+    """The best moves and scores of the first Connect4 positions, read from a memory-mapped file.
+
+    The file, written by `build`, holds the sorted keys (see `canonical_key`), then the scores
+    and the moves, which are looked up by binary search. Set as the `opening_book` of a
+    BaseMinimax, the moves of the book are played without searching.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError(f"{path} is not a Connect4 opening book")
+            count = int(np.frombuffer(f.read(8), dtype="<u8")[0])
+
+        offset = len(_MAGIC) + 8
+        self._keys = np.memmap(path, dtype="<u8", mode="r", offset=offset, shape=(count,))
+        offset += 8 * count
+        self._scores = np.memmap(path, dtype="<f4", mode="r", offset=offset, shape=(count,))
+        offset += 4 * count
+        self._moves = np.memmap(path, dtype="i1", mode="r", offset=offset, shape=(count,))
+
+    def __len__(self):
+        return len(self._keys)
+
+    def probe(self, state):
+        """Return the (score, move) tuple stored for the state, or None if it is not in the book."""
+        state = getattr(state, "top", state)  # A StateStack
+        key, mirrored = canonical_key(state)
+        i = int(np.searchsorted(self._keys, key))
+        if i == len(self._keys) or self._keys[i] != key:
+            return None
+
+        move = int(self._moves[i])
+        return float(self._scores[i]), (WIDTH - 1 - move if mirrored else move)
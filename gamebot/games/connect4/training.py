@@ -1,29 +1,39 @@
-from gamebot.ai import BaseMinimaxMLP
+from gamebot.ai import BaseMinimaxMLP, EndgameSolver
 from gamebot.genetics import Genetic
 from gamebot.games.connect4 import Connect4Engine
 
 
+# Shared by all the bots, the end of the games is solved instead of evaluated by the MLP
+_endgame_solver = EndgameSolver()
+
+
 class Connect4MinimaxMLP(BaseMinimaxMLP):
-    pass
+    def __init__(self, shape, weights=None):
+        super().__init__(shape, weights)
+        self.endgame_solver = _endgame_solver
 
 
-def fight_function(player1, player2):
+def fight_function(player1, player2, time_budget=None, node_budget=None, recorder=None):
     # player1 is 0 and player2 is 1
+    # The budgets, in seconds or nodes per move, are forwarded to the players' searches
+    # A GameRecorder (see gamebot.ai.dataset) given as recorder gets the positions of the game
     engine = Connect4Engine()
 
     turns = 0
 
     while not engine.is_over():
         turns += 1
-        if engine.current_player == 0:
-            move = player1.run(engine.state)
-        else:
-            move = player2.run(engine.state)
+        player = player1 if engine.current_player == 0 else player2
+        move = player.run(engine.state, time_budget=time_budget, node_budget=node_budget)
+        if recorder is not None:
+            recorder.record(engine.state, player)
 
         if not engine.play(move):
             raise ValueError("This is an invalid move, it should not happen")
 
     winner = engine.get_winner()
+    if recorder is not None:
+        recorder.end_game(winner)
     if winner == -1:
         return 1 / turns, 1 / turns
     elif winner == 0:
@@ -3,18 +3,31 @@ import pathlib
 import matplotlib.pyplot as plt
 import numpy as np
 
+from gamebot.ai.genomes import GenomeFile, write_genomes
 from .training import fight_function, TictactoeMinimaxMLP
 
+
+def best_genomes(log_path):
+    """Return the path of the genome file of the best algorithm of each generation of a training log.
+
+    It is written next to the log the first time, then the bots are loaded from it without
+    unpickling the log again and share its memory.
+    """
+    genomes_path = pathlib.Path(str(log_path) + ".genomes")
+    if not genomes_path.exists():
+        log_data = np.load(log_path, allow_pickle=True).item()
+        write_genomes(genomes_path, log_data["params_of_the_best_one"])
+    return genomes_path
+
+
 def run(filepath):
     reference = pathlib.Path(__file__).parent.resolve() / 'ref_training.npy'
     ref_data = np.load(reference, allow_pickle=True).item()
     ref_generations_score = np.array(ref_data['fitnesses'])
-    ref_bests_params = np.array(ref_data['params_of_the_best_one'])
 
 
     bench_data = np.load(filepath, allow_pickle=True).item()
     bench_generations_score = np.array(bench_data['fitnesses'])
-    bench_bests_params = np.array(bench_data['params_of_the_best_one'])
 
 
     plt.figure()
@@ -23,8 +36,11 @@ def run(filepath):
     plt.plot(abs(ref_generations_score[:,0] - bench_generations_score[:,0]))
     plt.show(block=False)
 
-    ref_algos = [TictactoeMinimaxMLP((10, 5, 1), 1, weights=p) for p in ref_bests_params]
-    bench_algos = [TictactoeMinimaxMLP((10, 5, 1), 1, weights=p) for p in bench_bests_params]
+    ref_genomes, bench_genomes = best_genomes(reference), best_genomes(filepath)
+    ref_algos = [TictactoeMinimaxMLP((10, 5, 1), 1, weights=(ref_genomes, i))
+                 for i in range(len(GenomeFile.open(ref_genomes)))]
+    bench_algos = [TictactoeMinimaxMLP((10, 5, 1), 1, weights=(bench_genomes, i))
+                   for i in range(len(GenomeFile.open(bench_genomes)))]
 
     bench_scores = []
 
@@ -42,7 +58,7 @@ def run(filepath):
     plt.title("Score against reference")
     plt.xlabel("Generation")
     ax1 = plt.gca()
-    ax2.tick_params(colors="tab:blue", which="both")
+    ax1.tick_params(colors="tab:blue", which="both")
     ax1.plot(bench_scores, label="Number of wins", color="tab:blue")
 
     ax2 = plt.twinx()
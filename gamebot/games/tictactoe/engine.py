@@ -1,7 +1,31 @@
-import copy
+import random
 
 from gamebot.games import BaseGameState
 
+_LINES = (
+    0b000000111, 0b000111000, 0b111000000,  # Rows
+    0b001001001, 0b010010010, 0b100100100,  # Columns
+    0b100010001, 0b001010100,  # Diagonals
+)
+# _WINNING[stones] is True if the 9-bit mask of stones contains a full line
+_WINNING = tuple(any(stones & line == line for line in _LINES) for stones in range(1 << 9))
+
+# Zobrist keys of a stone of each player on each cell, and of player 1 being the one to move
+_random = random.Random(3)
+_ZOBRIST = tuple(tuple(_random.getrandbits(64) for _ in range(9)) for _ in range(2))
+_ZOBRIST_PLAYER = _random.getrandbits(64)
+
+
+def _terminal_status(stones0, stones1, moves):
+    """Return the terminal status, as in `terminal_status`, from the stones of each player."""
+    if _WINNING[stones0]:
+        return 0
+    if _WINNING[stones1]:
+        return 1
+    if moves == 9:
+        return -1
+    return None
+
 
 class TictactoeEngine:
     """The game engine for tictactoe."""
@@ -31,13 +55,7 @@ class TictactoeEngine:
         return winner is not None
 
     def get_winner(self):
-        if self._state.has_won(0):
-            return 0
-        if self._state.has_won(1):
-            return 1
-        if self._state.is_tie():
-            return -1
-        return None
+        return self._state.terminal_status()
 
     def play(self, move):
         """Return True if the move has been played."""
@@ -63,63 +81,109 @@ class TictactoeState(BaseGameState):
     A move in tictactoe is represented with the number of the cell and the player in a tuple.
 
     The player is either 0 or 1. An empty cell is represented by -1.
+
+    The board is packed in two 9-bit masks where bit `3 * i + j` stands for the cell at row i,
+    column j: `_position` holds the stones of the player to move and `_mask` all the occupied cells.
     """
 
+    supports_push = True
+    supports_feature_changes = True
+    move_priors = (1, 0, 1, 0, 2, 0, 1, 0, 1)  # Number of lines through the cell, minus two
+
     def __init__(self, cell_played, player, board):
-        self._board = copy.deepcopy(board)
         self._origin_move = cell_played
         self._player = player  # Used in the `player` property of the base class
         self._origin_player = self.next_player
 
-    def possible_next_states(self):
-        for i in range(3):
-            for j in range(3):
-                if self._board[i][j] == -1:
-                    self._board[i][j] = self.player
-                    cell = 3 * i + j
+        self._position = 0
+        self._mask = 0
+        self._moves = 0
+        self._key = _ZOBRIST_PLAYER if player == 1 else 0
+        if board is not None:
+            for i in range(3):
+                for j in range(3):
+                    if board[i][j] != -1:
+                        self._mask |= 1 << (3 * i + j)
+                        self._moves += 1
+                        self._key ^= _ZOBRIST[board[i][j]][3 * i + j]
+                        if board[i][j] == player:
+                            self._position |= 1 << (3 * i + j)
+
+        self._update_status()
+
+        self._history = []  # Origin move and status before each move played with `push`
+
+    def _update_status(self):
+        opponent = self._position ^ self._mask
+        if self._player == 0:
+            self._status = _terminal_status(self._position, opponent, self._moves)
+        else:
+            self._status = _terminal_status(opponent, self._position, self._moves)
+
+    def _play(self, cell):
+        """Return the state reached when the player to move plays in `cell`."""
+        child = TictactoeState.__new__(TictactoeState)
+        child._origin_move = cell
+        child._player = self._origin_player
+        child._origin_player = self._player
+        # The stones of the opponent become the ones of the player to move
+        child._position = self._position ^ self._mask
+        child._mask = self._mask | (1 << cell)
+        child._key = self._key ^ _ZOBRIST[self._player][cell] ^ _ZOBRIST_PLAYER
+        child._moves = self._moves + 1
+        child._update_status()
+        child._history = []
+        return child
 
-                    try:
-                        yield TictactoeState(cell, self.next_player, self._board)
-                    finally:
-                        self._board[i][j] = -1  # Back to original state
+    def possible_next_states(self):
+        for cell in range(9):
+            if not self._mask >> cell & 1:
+                yield self._play(cell)
+
+    def legal_moves(self):
+        return [cell for cell in range(9) if not self._mask >> cell & 1]
+
+    def push(self, cell):
+        self._history.append((self._origin_move, self._status))
+        self._position ^= self._mask
+        self._mask |= 1 << cell
+        self._key ^= _ZOBRIST[self._player][cell] ^ _ZOBRIST_PLAYER
+        self._moves += 1
+        self._origin_move = cell
+        self._player, self._origin_player = self._origin_player, self._player
+        self._update_status()
+
+    def pop(self):
+        self._mask ^= 1 << self._origin_move
+        self._position ^= self._mask
+        self._moves -= 1
+        self._player, self._origin_player = self._origin_player, self._player
+        self._key ^= _ZOBRIST[self._player][self._origin_move] ^ _ZOBRIST_PLAYER
+        self._origin_move, self._status = self._history.pop()
 
     def is_tie(self):
-        for i in range(3):
-            for j in range(3):
-                if self._board[i][j] == -1:
-                    return False
-        return not (self.has_won(0) or self.has_won(1))
+        return self._status == -1
 
     def has_won(self, player):
-        for i in range(3):
-            if (
-                self._board[i][0] == self._board[i][1]
-                and self._board[i][1] == self._board[i][2]
-                and self._board[i][2] == player
-            ):
-                return True
-            if (
-                self._board[0][i] == self._board[1][i]
-                and self._board[1][i] == self._board[2][i]
-                and self._board[2][i] == player
-            ):
-                return True
-
-        if (
-            self._board[0][0] == self._board[1][1]
-            and self._board[1][1] == self._board[2][2]
-            and self._board[2][2] == player
-        ):
-            return True
-
-        if (
-            self._board[0][2] == self._board[1][1]
-            and self._board[1][1] == self._board[2][0]
-            and self._board[2][0] == player
-        ):
-            return True
-
-        return False
+        if player == self._player:
+            return _WINNING[self._position]
+        return _WINNING[self._position ^ self._mask]
+
+    def terminal_status(self):
+        return self._status
+
+    @property
+    def position_key(self):
+        return self._key
+
+    @property
+    def empty_cells(self):
+        return 9 - self._moves
+
+    def feature_changes(self, cell):
+        # The player to move changes, and the cell goes from empty (-1) to the player
+        player = self._player
+        return ((0, 1 - 2 * player), (1 + cell, player + 1))
 
     @property
     def next_player(self):
@@ -129,10 +193,20 @@ class TictactoeState(BaseGameState):
 
     def __iter__(self):
         yield self.player
-        yield from (self._board[i][j] for i in range(3) for j in range(3))
+        for cell in range(9):
+            if not self._mask >> cell & 1:
+                yield -1
+            elif self._position >> cell & 1:
+                yield self._player
+            else:
+                yield self._origin_player
 
     def __eq__(self, other):
-        return np.all(self._board == other._board) and self.player == other.player
+        return (
+            self._position == other._position
+            and self._mask == other._mask
+            and self.player == other.player
+        )
 
     def __hash__(self):
-        return hash(tuple(self))
+        return self._key
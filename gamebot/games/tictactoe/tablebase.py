@@ -0,0 +1,121 @@
+import pathlib
+
+import numpy as np
+
+from .engine import _WINNING
+
+DEFAULT_PATH = pathlib.Path(__file__).parent.resolve() / "tablebase.bin"
+
+_MAGIC = b"TTTBASE1"
+_SIZE = 2 * 3**9  # Each cell is empty or has a stone of a player, and either player can be next
+
+# Value codes of an entry, for the player to move
+_UNKNOWN, _LOSS, _DRAW, _WIN = range(4)
+
+# _BASE3[stones] is the base 3 number with a 1 digit for each stone of the 9-bit mask
+_BASE3 = tuple(sum(3**cell for cell in range(9) if stones >> cell & 1) for stones in range(1 << 9))
+
+
+def _index(stones0, stones1, player):
+    return _BASE3[stones0] + 2 * _BASE3[stones1] + 3**9 * player
+
+
+def _entry(value, distance, moves):
+    """Pack an entry: the moves in bits 0-8, the value code in 9-10 and the distance to the end in 11-14."""
+    return moves | value << 9 | distance << 11
+
+
+def generate(path=DEFAULT_PATH):
+    """Compute every tictactoe position by retrograde analysis and write the table to path.
+
+    The positions are solved from the full boards back to the empty one, each from the values
+    of its children. An entry holds the value for the player to move, the number of moves left
+    until the end with perfect play and the mask of the best moves: the fastest wins, any draw
+    or the slowest losses.
+    """
+    table = np.zeros(_SIZE, dtype="<u2")
+    positions = [(s0, s1) for s0 in range(1 << 9) for s1 in range(1 << 9) if not s0 & s1]
+    positions.sort(key=lambda position: bin(position[0] | position[1]).count("1"), reverse=True)
+
+    for s0, s1 in positions:
+        if _WINNING[s0] and _WINNING[s1]:
+            continue  # Not a position of a game
+
+        for player in (0, 1):
+            mine, theirs = (s0, s1) if player == 0 else (s1, s0)
+            if _WINNING[theirs]:
+                table[_index(s0, s1, player)] = _entry(_LOSS, 0, 0)
+                continue
+            if _WINNING[mine]:
+                table[_index(s0, s1, player)] = _entry(_WIN, 0, 0)
+                continue
+            if s0 | s1 == 0x1FF:
+                table[_index(s0, s1, player)] = _entry(_DRAW, 0, 0)
+                continue
+
+            best_rank, best_moves = None, 0
+            for cell in range(9):
+                if (s0 | s1) >> cell & 1:
+                    continue
+                bit = 1 << cell
+                child = int(table[_index(s0 | bit * (player == 0), s1 | bit * (player == 1), 1 - player)])
+                value, distance = _WIN + _LOSS - (child >> 9 & 0x3), (child >> 11) + 1
+                rank = (value, -distance if value == _WIN else distance)
+                if best_rank is None or rank > best_rank:
+                    best_rank, best_moves = rank, 1 << cell
+                elif rank == best_rank:
+                    best_moves |= 1 << cell
+
+            value, distance = best_rank[0], abs(best_rank[1])
+            table[_index(s0, s1, player)] = _entry(value, distance, best_moves)
+
+    with open(path, "wb") as f:
+        f.write(_MAGIC)
+        f.write(table.tobytes())
+
+
+class TictactoeTablebase:
+    """Exact values and best moves of all the tictactoe positions, read from a memory-mapped file.
+
+    The file is generated by `generate` if it does not exist yet. Set as the `tablebase` of a
+    BaseMinimax, it makes the algorithm play perfectly without searching.
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        path = pathlib.Path(path)
+        if not path.exists():
+            generate(path)
+        with open(path, "rb") as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError(f"{path} is not a tictactoe tablebase")
+
+        self._table = np.memmap(path, dtype="<u2", mode="r", offset=len(_MAGIC), shape=(_SIZE,))
+
+    def _entry(self, state):
+        state = getattr(state, "top", state)  # A StateStack
+        stones = state._position, state._position ^ state._mask
+        if state.player == 1:
+            stones = stones[::-1]
+        return int(self._table[_index(stones[0], stones[1], state.player)])
+
+    def value(self, state):
+        """Return 1 if the player to move wins with perfect play, 0 for a tie and -1 for a loss."""
+        code = self._entry(state) >> 9 & 0x3
+        return None if code == _UNKNOWN else code - _DRAW
+
+    def distance(self, state):
+        """Return the number of moves left until the end of the game with perfect play."""
+        return self._entry(state) >> 11
+
+    def best_moves(self, state):
+        """Return the list of the moves keeping the value of the state, the fastest to win or slowest to loose."""
+        moves = self._entry(state) & 0x1FF
+        return [cell for cell in range(9) if moves >> cell & 1]
+
+    def probe(self, state):
+        """Return the (value, best move) tuple of the state, None if the game is over."""
+        entry = self._entry(state)
+        moves = entry & 0x1FF
+        if not moves:
+            return None
+        return (entry >> 9 & 0x3) - _DRAW, (moves & -moves).bit_length() - 1
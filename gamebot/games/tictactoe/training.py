@@ -9,23 +9,27 @@ class TictactoeMinimaxMLP(BaseMinimaxMLP):
         self.max_depth = max_depth
 
 
-def fight_function(player1, player2, turn_normalization=True):
+def fight_function(player1, player2, turn_normalization=True, time_budget=None, node_budget=None, recorder=None):
     # player1 is 0 and player2 is 1
+    # The budgets, in seconds or nodes per move, are forwarded to the players' searches
+    # A GameRecorder (see gamebot.ai.dataset) given as recorder gets the positions of the game
     engine = TictactoeEngine()
 
     turns = 0
 
     while not engine.is_over():
         turns += 1
-        if engine.current_player == 0:
-            move = player1.run(engine.state)
-        else:
-            move = player2.run(engine.state)
+        player = player1 if engine.current_player == 0 else player2
+        move = player.run(engine.state, time_budget=time_budget, node_budget=node_budget)
+        if recorder is not None:
+            recorder.record(engine.state, player)
 
         if not engine.play(move):
             raise ValueError("This is an invalid move, it should not happen")
 
     winner = engine.get_winner()
+    if recorder is not None:
+        recorder.end_game(winner)
     if not turn_normalization:
         turns = 1
 
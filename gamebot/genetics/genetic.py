@@ -53,12 +53,16 @@ class Genetic:
 
         self.max_gen = n
         self.current_gen = 0
-        self.log_data = {"fitnesses": [], "params_of_the_best_one": []}
+        self.log_data = {"fitnesses": [], "params_of_the_best_one": [], "memo_hit_rates": []}
 
         for i in range(n):
             self.current_gen = i
             print(f"\r.....Training generation {i+1}/{n}", end="                             ")
             self._evaluate()
+            hit_rate = self._memo_hit_rate()
+            self.log_data["memo_hit_rates"].append(hit_rate)
+            if hit_rate is not None:
+                print(f" - move memo hit rate {hit_rate:.1%}", end="")
             self._sort()
             if self.hyper_parameters["log"] is not None:
                 self.log(self.population, i)
@@ -83,6 +87,8 @@ class Genetic:
         for algo in self.population:
             algo.fitness = 0
             algo.fight_count = 0
+            if hasattr(algo, "memo_lookups"):
+                algo.memo_lookups = algo.memo_hits = 0
 
         for i, algo in enumerate(self.population):
             print(f"\r.....Training generation {self.current_gen+1}/{self.max_gen}"
@@ -108,6 +114,30 @@ class Genetic:
 
         self.population_fitness = total_fitness
 
+    def stacked_mlp(self, algorithms=None):
+        """Return a StackedMLP of the MLPs of the algorithms, the whole population by default.
+
+        Return None if the algorithms do not all have an `mlp` of the same shape. The weights are
+        copied, so the stack should be built again once the parameters change.
+        """
+        from gamebot.ai.mlp import StackedMLP  # Imported here since gamebot.ai depends on this package
+
+        algorithms = self.population if algorithms is None else algorithms
+        mlps = [getattr(algo, "mlp", None) for algo in algorithms]
+        if not mlps or any(mlp is None or tuple(mlp.shape) != tuple(mlps[0].shape) for mlp in mlps):
+            return None
+        return StackedMLP.from_mlps(mlps)
+
+    def _memo_hit_rate(self):
+        """Return the ratio of the moves of the last evaluation found in the memo of the algorithms.
+
+        Return None if the algorithms have no move memo (see BaseMinimax.move_memo_size).
+        """
+        lookups = sum(getattr(algo, "memo_lookups", 0) for algo in self.population)
+        if not lookups:
+            return None
+        return sum(algo.memo_hits for algo in self.population) / lookups
+
     def _evolve(self):
         """Make the whole population evolve.
 
@@ -1,3 +1,5 @@
+import copy
+import threading
 from abc import ABC, abstractmethod
 
 
@@ -6,8 +8,14 @@ class BaseGameCLI(ABC):
 
     We suppose that the user input is a list of integer, it may change in future implementation
     but for now it fits all needs.
+
+    While a human thinks about a move and the bot plays next, the bot ponders: it searches the
+    replies of the human in a background thread, the predicted one first. When the human plays
+    one of them, the bot plays the pondered move right away. Set `ponder` to False to disable it.
     """
 
+    ponder = True
+
     @classmethod
     @abstractmethod
     def parse_input(cls, player_input):
@@ -31,6 +39,13 @@ class BaseGameCLI(ABC):
 
     def _human_play(self):
         """Ask the user a move and plays it on the engine."""
+        self._start_pondering()
+        try:
+            self._ask_human_move()
+        finally:
+            self._stop_pondering()
+
+    def _ask_human_move(self):
         while True:
             try:
                 player_sign = self.player_to_sign(self.engine.current_player)
@@ -57,7 +72,11 @@ class BaseGameCLI(ABC):
     def _bot_play(self):
         """Run the bot and play his move."""
         print(f"It is the bot turn ({self.player_to_sign(self.engine.current_player)})")
-        move = self.bot.run(self.engine.state)
+        pondered = getattr(self, "_pondered", {}).get(self.engine.state)
+        if pondered is not None:
+            move, self.bot.principal_variation = pondered
+        else:
+            move = self.bot.run(self.engine.state)
 
         if not self.engine.play(move):
             print("Error: The AI generates an invalid move!")
@@ -65,6 +84,45 @@ class BaseGameCLI(ABC):
 
         self.print_board(self.engine.board)
 
+    def _start_pondering(self):
+        """Start searching the replies of the current player, if the bot plays next."""
+        self._pondered = {}
+        if not self.ponder or 1 - self.engine.current_player not in getattr(self, "_bot_players", ()):
+            return
+
+        self._ponder_stop = threading.Event()
+        self._ponder_thread = threading.Thread(
+            target=self._ponder, args=(copy.deepcopy(self.engine.state),), daemon=True
+        )
+        self._ponder_thread.start()
+
+    def _ponder(self, state):
+        """Search each reply of the given state until all are done or pondering is stopped."""
+        replies = list(state.possible_next_states())
+        pv = self.bot.principal_variation
+        if len(pv) > 1:  # The bot expects the human to play the second move of its line
+            replies.sort(key=lambda reply: reply.last_move != pv[1])
+
+        self.bot.stop_event = self._ponder_stop
+        try:
+            for reply in replies:
+                if self._ponder_stop.is_set() or reply.terminal_status() is not None:
+                    continue
+                move = self.bot.run(reply)
+                if move is None or self._ponder_stop.is_set():
+                    break
+                self._pondered[reply] = (move, self.bot.principal_variation)
+        finally:
+            self.bot.stop_event = None
+
+    def _stop_pondering(self):
+        """Cancel the pondering search and wait for its thread."""
+        thread = getattr(self, "_ponder_thread", None)
+        if thread is not None:
+            self._ponder_stop.set()
+            thread.join()
+            self._ponder_thread = None
+
     def _end(self):
         """Display an end message on stdout."""
         print("Finished!")
@@ -125,6 +183,7 @@ class BaseGameCLI(ABC):
         """Run a game cli with the given engine and bot defined, as class attributes, until the game stops."""
 
         p0, p1 = self._ask_players_kind()
+        self._bot_players = [i for i, play in enumerate((p0, p1)) if play == self._bot_play]
 
         while not self.engine.is_over():
             if self.engine.current_player == 0:
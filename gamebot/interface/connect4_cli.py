@@ -1,7 +1,8 @@
 from colored import fg, attr
 
-from gamebot.ai import BaseMinimaxMLP
+from gamebot.ai import BaseMinimaxMLP, TranspositionTable
 from gamebot.games.connect4 import Connect4Engine
+from gamebot.games.connect4.opening_book import Connect4OpeningBook
 from .base_game_cli import BaseGameCLI
 
 
@@ -12,11 +13,19 @@ class Connect4MinimaxMLP(BaseMinimaxMLP):
 class Connect4CLI(BaseGameCLI):
     """Implements the Connect4CLI."""
 
-    def __init__(self):
+    def __init__(self, time_budget=None, opening_book=None):
+        """The bot searches at a fixed depth, or as deep as it can in `time_budget` seconds.
+
+        The path of an opening book built by `gamebot.games.connect4.opening_book.build` can be given.
+        """
         self.engine = Connect4Engine()
         input_size = len(self.engine.board) * len(self.engine.board[0]) + 1
         self.bot = Connect4MinimaxMLP((input_size, 5, 1), "connect4MLP_last_weights.npy")
         self.bot.max_depth = 6
+        self.bot.transposition_table = TranspositionTable()
+        self.bot.time_budget = time_budget
+        if opening_book is not None:
+            self.bot.opening_book = Connect4OpeningBook(opening_book)
 
     @classmethod
     def player_to_sign(cls, cell):
@@ -2,6 +2,7 @@ from colored import fg, attr
 
 from gamebot.ai import BaseMinimaxMLP
 from gamebot.games.tictactoe import TictactoeEngine
+from gamebot.games.tictactoe.tablebase import TictactoeTablebase
 from .base_game_cli import BaseGameCLI
 
 
@@ -16,6 +17,7 @@ class TictactoeCLI(BaseGameCLI):
         self.engine = TictactoeEngine()
         self.bot = TictactoeMinimaxMLP((10, 5, 1), "tictactoeMLP_weights.npy")
         self.bot.max_depth = 2
+        self.bot.tablebase = TictactoeTablebase()  # Perfect play, without any search
 
     @classmethod
     def player_to_sign(cls, cell):
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from gamebot.ai.dataset import GameRecorder, ShardReader, ShardWriter, game_records, record_dtype, self_play
+from gamebot.games.tictactoe import TictactoeEngine, TictactoeMinimax
+from gamebot.games.tictactoe.training import TictactoeMinimaxMLP, fight_function
+
+
+def records(count, input_size=10):
+    array = np.zeros(count, dtype=record_dtype(input_size))
+    array["score"] = np.arange(count)
+    return array
+
+
+def test_shards(tmp_path):
+    with ShardWriter(tmp_path, 10, shard_size=100) as writer:
+        writer.write(records(250))
+    names = sorted(path.name for path in tmp_path.iterdir())
+    assert names == ["shard-00000.bin", "shard-00001.bin", "shard-00002.bin"]
+
+    # A record written in part is dropped, the last shard is completed first
+    with open(tmp_path / "shard-00002.bin", "ab") as f:
+        f.write(b"\0" * 5)
+    with ShardWriter(tmp_path, 10, shard_size=100) as writer:
+        writer.write(records(60))
+    assert len(list(tmp_path.iterdir())) == 4
+
+    reader = ShardReader(tmp_path)
+    assert len(reader) == 310
+    batches = list(reader.minibatches(32, mixed_shards=2, seed=0))
+    assert all(len(batch) <= 32 for batch in batches)
+    scores = np.sort(np.concatenate([batch["score"] for batch in batches]))
+    assert np.all(scores == np.sort(np.concatenate([np.arange(250), np.arange(60)])))
+    assert not np.all(batches[0]["score"][1:] >= batches[0]["score"][:-1])  # Shuffled
+
+
+def test_game_records():
+    positions = [([0] * 10, 0, 1.5), ([1] * 10, 1, -2.0)]
+    assert [record[3] for record in game_records(positions, 0)] == [1, -1]
+    assert [record[3] for record in game_records(positions, -1)] == [0, 0]
+
+
+def test_self_play():
+    game = list(self_play(TictactoeEngine, TictactoeMinimax(), TictactoeMinimax()))
+    assert 5 <= len(game) <= 9
+    assert [player for _, player, _, _ in game] == [i % 2 for i in range(len(game))]
+    outcomes = [outcome for _, _, _, outcome in game]
+    assert outcomes[1::2] == [-outcome for outcome in outcomes[::2]][:len(outcomes[1::2])]
+    assert game[0][0] == list(TictactoeEngine().state)
+
+
+def test_fight_function_recorder(tmp_path):
+    player1, player2 = TictactoeMinimaxMLP((10, 5, 1), 1), TictactoeMinimaxMLP((10, 5, 1), 1)
+    with ShardWriter(tmp_path, 10) as writer:
+        recorder = GameRecorder(writer)
+        fight_function(player1, player2, recorder=recorder)
+        fight_function(player2, player1, recorder=recorder)
+
+    reader = ShardReader(tmp_path)
+    assert 10 <= len(reader) <= 18
+    batch = next(reader.minibatches(len(reader)))
+    assert set(np.unique(batch["outcome"])) <= {-1, 0, 1}
+    assert not np.any(np.isnan(batch["score"]))
+
+    losses = player1.mlp.fit(batch["state"], -batch["outcome"], epochs=5)
+    assert len(losses) == 5
+
+    with pytest.raises(ValueError):
+        (tmp_path / "shard-00001.bin").write_bytes(b"not a shard at all")
+        ShardReader(tmp_path)
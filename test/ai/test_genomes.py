@@ -0,0 +1,71 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from gamebot.ai import BaseMinimaxMLP
+from gamebot.ai.genomes import GenomeFile, write_genomes
+from gamebot.ai.mlp import MLP
+from gamebot.games.tictactoe import TictactoeEngine
+
+
+class DummyMinimaxMLP(BaseMinimaxMLP):
+    def evaluator(self):
+        pass
+
+
+def test_genome_file(tmp_path):
+    genomes = np.random.uniform(-1, 1, (4, 61))
+    write_genomes(tmp_path / "g.genomes", genomes, labels=[10, 11, 12, 12])
+
+    genome_file = GenomeFile(tmp_path / "g.genomes")
+    assert len(genome_file) == 4
+    assert np.all(genome_file[2] == genomes[2])
+    assert genome_file.find(12) == 2
+    assert genome_file.find(13) is None
+    assert GenomeFile.open(tmp_path / "g.genomes") is GenomeFile.open(tmp_path / "g.genomes")
+
+    with pytest.raises(ValueError):
+        write_genomes(tmp_path / "bad.genomes", [[1, 2], [3]])
+    np.save(tmp_path / "weights.npy", genomes[0])
+    with pytest.raises(ValueError):
+        GenomeFile(tmp_path / "weights.npy")
+
+
+def test_bots_share_genomes(tmp_path):
+    genomes = np.random.uniform(-1, 1, (3, 61))
+    path = tmp_path / "g.genomes"
+    write_genomes(path, genomes)
+
+    bots = [DummyMinimaxMLP((10, 5, 1), weights=(path, i)) for i in range(3)]
+    for bot, genome in zip(bots, genomes):
+        assert np.all(bot.parameters == genome)
+        assert np.shares_memory(bot.mlp._parameters, GenomeFile.open(path)._genomes)
+
+    # Pickles only hold the path of the file
+    copy = pickle.loads(pickle.dumps(bots[1]))
+    assert len(pickle.dumps(bots[1].mlp)) < genomes[1].nbytes
+    assert np.shares_memory(copy.mlp._parameters, GenomeFile.open(path)._genomes)
+    state = TictactoeEngine().state
+    assert copy.run(state) == bots[1].run(state)
+
+    # Copied when changed, the file is left as it is
+    bots[0].parameters = bots[0].parameters + 1
+    bots[2].mlp.layers[1] = (np.zeros((1, 5)), [0])
+    assert np.all(bots[0].parameters == genomes[0] + 1)
+    assert np.all(bots[2].mlp.layers[1][0] == 0)
+    assert np.all(GenomeFile.open(path)[0] == genomes[0])
+    assert np.all(GenomeFile.open(path)[2] == genomes[2])
+
+
+def test_load_npy(tmp_path):
+    parameters = np.random.uniform(-1, 1, 61)
+    np.save(tmp_path / "weights.npy", parameters)
+
+    mlp = MLP.load((10, 5, 1), str(tmp_path / "weights.npy"))
+    assert np.all(mlp.parameters == parameters)
+    assert not mlp._parameters.flags.writeable
+
+    np.save(tmp_path / "object.npy", np.array([parameters], dtype=object))
+    with pytest.raises(ValueError):  # Pickles are not loaded
+        MLP.load((10, 5, 1), str(tmp_path / "object.npy"))
@@ -0,0 +1,79 @@
+import numpy as np
+
+from gamebot.ai import MCTS
+from gamebot.ai.mlp import MLP
+from gamebot.games.connect4 import Connect4Engine
+from gamebot.games.tictactoe import TictactoeState
+
+
+def gen_mcts(iterations=400):
+    np.random.seed(0)
+    mcts = MCTS((10, 5, 1))
+    mcts.iterations = iterations
+    return mcts
+
+
+def test_forward_propagation_batch():
+    mlp = MLP((4, 3, 1))
+    inputs = np.random.uniform(-1, 1, (5, 4))
+    expected = [mlp.forward_propagation(x)[0] for x in inputs]
+
+    assert np.allclose(mlp.forward_propagation_batch(inputs)[:, 0], expected)
+
+
+def test_run_wins_and_blocks():
+    state = TictactoeState(None, 0, [[0, 0, -1], [1, 1, -1], [-1, -1, -1]])
+    assert gen_mcts().run(state) == 2
+
+    state = TictactoeState(None, 1, [[0, 0, -1], [1, -1, -1], [-1, -1, -1]])
+    assert gen_mcts().run(state) == 2
+
+
+def test_run_restores_state():
+    state = TictactoeState(None, 0, [[0, 1, -1], [-1, 1, -1], [-1, -1, -1]])
+    before = list(state)
+    mcts = gen_mcts()
+
+    mcts.run(state)
+
+    assert list(state) == before
+    assert mcts.simulations == 400
+    assert mcts._visits[mcts._root] == 400
+
+
+def test_time_budget():
+    import time
+
+    mcts = gen_mcts()
+    mcts.mlp = MLP((43, 5, 1))
+    start = time.perf_counter()
+    assert mcts.run(Connect4Engine().state, time_budget=0.2) in range(7)
+    assert time.perf_counter() - start < 0.5
+    assert mcts.simulations > 0
+
+
+def test_tree_reuse():
+    mcts = gen_mcts()
+    state = TictactoeState(None, 0, None)
+
+    move = mcts.run(state)
+    state.push(move)
+    state.push(state.legal_moves()[0])
+    mcts.run(state)
+
+    assert mcts._root != 0
+    assert mcts._visits[mcts._root] > 400
+
+    mcts.reuse_tree = False
+    mcts.run(state)
+    assert mcts._root == 0
+    assert mcts._visits[0] == 400
+
+
+def test_parameters_property():
+    mcts = gen_mcts()
+    params = mcts.parameters
+
+    assert len(params) == 10 * 5 + 5 + 5 + 1
+    mcts.parameters = params
+    assert np.all(mcts.parameters == params)
@@ -0,0 +1,264 @@
+from gamebot.ai import TranspositionTable
+from gamebot.games import StateStack
+from gamebot.games.tictactoe import TictactoeMinimax, TictactoeState
+
+
+class GeneratorOnlyState(TictactoeState):
+    """A tictactoe state without the in-place protocol."""
+
+    supports_push = False
+
+    def _play(self, cell):
+        child = super()._play(cell)
+        child.__class__ = GeneratorOnlyState
+        return child
+
+
+def gen_bot(depth):
+    bot = TictactoeMinimax()
+    bot.max_depth = depth
+    return bot
+
+
+def test_state_stack():
+    state = GeneratorOnlyState(None, 0, [[0, 1, -1], [-1, 1, -1], [-1, -1, -1]])
+    stack = StateStack(state)
+
+    assert stack.legal_moves() == [2, 3, 5, 6, 7, 8]
+    stack.push(3)
+    assert not stack.has_won(0)
+    assert stack.last_move == 3
+    assert stack.player == 1
+    stack.push(7)
+    assert stack.has_won(1)
+    stack.pop()
+    stack.pop()
+    assert stack.top is state
+
+
+def test_run_restores_state():
+    state = TictactoeState(None, 0, [[0, 1, -1], [-1, 1, -1], [-1, -1, -1]])
+    before = list(state)
+
+    gen_bot(9).run(state)
+
+    assert list(state) == before
+    assert state.last_move is None
+
+
+def test_run_in_place_matches_generator():
+    boards = [
+        [[-1, -1, -1], [-1, -1, -1], [-1, -1, -1]],
+        [[0, 1, -1], [-1, 1, -1], [-1, -1, -1]],
+        [[0, -1, -1], [-1, 1, -1], [-1, -1, 0]],
+    ]
+    for board in boards:
+        for depth in (1, 2, 4, 9):
+            in_place = gen_bot(depth).run(TictactoeState(None, 0, board))
+            generated = gen_bot(depth).run(GeneratorOnlyState(None, 0, board))
+            assert in_place == generated
+
+
+def test_run_blocks_and_wins():
+    # Player 0 has to block the column
+    state = TictactoeState(None, 0, [[1, 0, -1], [1, -1, -1], [-1, -1, 0]])
+    assert gen_bot(9).run(state) == 6
+
+    # Player 0 wins instead of blocking
+    state = TictactoeState(None, 0, [[0, 0, -1], [1, 1, -1], [-1, -1, -1]])
+    assert gen_bot(9).run(state) == 2
+
+
+def test_run_node_budget():
+    state = TictactoeState(None, 0, [[-1, -1, -1], [-1, -1, -1], [-1, -1, -1]])
+    before = list(state)
+    bot = gen_bot(2)
+
+    move = bot.run(state, node_budget=300)
+
+    assert move in range(9)
+    assert bot.nodes <= 300
+    assert list(state) == before
+    # Deterministic: the same budget gives the same move
+    assert gen_bot(2).run(state, node_budget=300) == move
+
+
+def test_run_time_budget():
+    import time
+
+    state = TictactoeState(None, 0, [[-1, -1, -1], [-1, -1, -1], [-1, -1, -1]])
+    bot = gen_bot(2)
+
+    start = time.perf_counter()
+    move = bot.run(state, time_budget=0.05)
+    assert time.perf_counter() - start < 0.5
+    assert move in range(9)
+
+
+def test_iterative_deepening_until_solved():
+    state = TictactoeState(None, 0, [[1, 0, -1], [1, -1, -1], [-1, -1, 0]])
+    bot = gen_bot(1)
+
+    # The whole tree is small, so the deepening stops by itself before the budget is spent
+    assert bot.run(state, time_budget=60) == 6
+    assert bot.principal_variation[0] == 6
+    assert bot.run(state, node_budget=10**6) == 6
+
+
+def test_principal_variation():
+    state = TictactoeState(None, 0, [[0, 0, -1], [1, 1, -1], [-1, -1, -1]])
+    bot = gen_bot(3)
+    bot.run(state)
+    assert bot.principal_variation == [2]
+
+
+def test_move_ordering_same_score_fewer_nodes():
+    import numpy as np
+    from gamebot.games.connect4 import Connect4Engine
+    from gamebot.games.connect4.training import Connect4MinimaxMLP
+
+    np.random.seed(3)
+    bot = Connect4MinimaxMLP((43, 5, 1))
+    bot.max_depth = 5
+
+    nodes = {False: 0, True: 0}
+    for moves in ([], [3, 3, 2, 4], [0, 6, 1, 5, 3], [2, 2, 2, 3, 4, 4, 1]):
+        engine = Connect4Engine()
+        for move in moves:
+            engine.play(move)
+
+        scores = {}
+        for ordering in (False, True):
+            bot.move_ordering = ordering
+            bot.run(engine.state)
+            nodes[ordering] += bot.nodes
+            scores[ordering] = bot.best_score
+        assert scores[True] == scores[False]
+
+    assert nodes[True] < nodes[False]
+
+
+def test_order_moves():
+    state = TictactoeState(None, 0, [[-1, -1, -1], [-1, -1, -1], [-1, -1, -1]])
+    bot = gen_bot(2)
+    bot.run(state)
+    bot._killers[0] = [None, None]
+    bot._history = ({}, {})
+
+    moves = state.legal_moves()
+    bot.order_moves(state, moves, 0)
+    assert moves[0] == 4  # Center first
+
+    bot._killers[0] = [7, None]
+    bot.order_moves(state, moves, 0, hash_move=5)
+    assert moves[:2] == [5, 7]
+
+
+def test_search_options_same_result():
+    import numpy as np
+    from gamebot.games.connect4 import Connect4Engine
+    from gamebot.games.connect4.training import Connect4MinimaxMLP
+
+    np.random.seed(5)
+    bot = Connect4MinimaxMLP((43, 5, 1))
+    bot.max_depth = 4
+    engine = Connect4Engine()
+    for move in [3, 2, 3, 4]:
+        engine.play(move)
+
+    results = []
+    for pvs, aspiration in ((False, None), (True, None), (True, 0.01), (True, 100)):
+        bot.pvs = pvs
+        bot.aspiration_window = aspiration
+        move = bot.run(engine.state, node_budget=3000)
+        results.append((move, bot.best_score, bot.depth_reached))
+
+    assert all(r == results[0] for r in results)
+
+
+def test_late_move_reduction():
+    state = TictactoeState(None, 0, [[1, 0, -1], [1, -1, -1], [-1, -1, 0]])
+    bot = gen_bot(9)
+    bot.late_move_reduction = True
+    assert bot.run(state) == 6
+    assert bot.best_score > 1e8  # Player 0 wins after blocking
+
+
+def test_parallel_same_result():
+    import copy
+    import numpy as np
+    from gamebot.games.connect4 import Connect4Engine
+    from gamebot.games.connect4.training import Connect4MinimaxMLP
+
+    np.random.seed(6)
+    serial = Connect4MinimaxMLP((43, 5, 1))
+    serial.max_depth = 4
+    parallel = copy.deepcopy(serial)
+    parallel.processes = 2
+    assert parallel.incremental  # The workers wrap their state with the accumulators again
+
+    try:
+        engine = Connect4Engine()
+        for move in [3, 3, 2, 4, 4, 1]:
+            expected = serial.run(engine.state)
+            assert parallel.run(engine.state) == expected
+            assert parallel.best_score == serial.best_score
+            # Equal lines deeper in the tree may be found in another order by the workers
+            assert parallel.principal_variation[0] == expected
+            engine.play(move)
+
+        parallel.late_move_reduction = True
+        parallel.aspiration_window = 0.01
+        assert parallel.run(engine.state, node_budget=5000) in engine.state.legal_moves()
+        assert copy.deepcopy(parallel)._pool is None
+    finally:
+        parallel.close()
+
+
+def test_move_memo():
+    import numpy as np
+    from gamebot.games.connect4 import Connect4Engine
+    from gamebot.games.connect4.training import Connect4MinimaxMLP
+
+    np.random.seed(8)
+    bot = Connect4MinimaxMLP((43, 5, 1))
+    bot.max_depth = 4
+    bot.move_memo_size = 2
+    engine = Connect4Engine()
+
+    move = bot.run(engine.state)
+    score, pv = bot.best_score, bot.principal_variation
+    assert bot.run(engine.state) == move
+    assert (bot.best_score, bot.principal_variation, bot.nodes) == (score, pv, 0)
+    assert (bot.memo_hits, bot.memo_lookups) == (1, 2)
+
+    bot.max_depth = 3  # Another depth is another search
+    bot.run(engine.state)
+    assert bot.nodes > 0
+    engine.play(3)
+    bot.run(engine.state)  # The LRU drops the depth 4 search
+    bot.max_depth = 4
+    bot.run(Connect4Engine().state)
+    assert bot.nodes > 0
+
+    bot.run(Connect4Engine().state, time_budget=0.05)  # Not deterministic, never memoized
+    assert bot.nodes > 0
+    assert bot.memo_lookups == 5
+
+    bot.parameters = bot.parameters
+    bot.run(Connect4Engine().state)
+    assert bot.nodes > 0
+    assert bot.memo_hits == 1
+
+    bot.pvs = False  # Other settings are another search
+    bot.run(Connect4Engine().state)
+    assert bot.nodes > 0
+    bot.pvs = True
+    bot.run(Connect4Engine().state)
+    assert bot.nodes == 0
+
+    bot.transposition_table = TranspositionTable(2**10)
+    lookups = bot.memo_lookups
+    bot.run(Connect4Engine().state)
+    assert bot.nodes > 0
+    assert bot.memo_lookups == lookups
@@ -1,4 +1,5 @@
 import numpy as np
+import pytest
 
 from gamebot.ai import BaseMinimaxMLP
 
@@ -23,3 +24,97 @@ def test_parameters_property():
 class DummyMinimaxMLP(BaseMinimaxMLP):
      def evaluator(self):
         pass
+
+
+def test_batched_frontier_same_result():
+    from gamebot.games.connect4 import Connect4Engine
+
+    batched = DummyMinimaxMLP((43, 5, 1))
+    batched.max_depth = 4
+    batched.batch_frontier = True
+    single = DummyMinimaxMLP((43, 5, 1), weights=batched.parameters)
+    single.max_depth = 4
+
+    state = Connect4Engine().state
+    for move in (3, 3, 2, 4):
+        state.push(move)
+    assert batched.run(state) == single.run(state)
+    assert np.isclose(batched.best_score, single.best_score)
+
+
+def test_incremental_same_result():
+    from gamebot.games.connect4 import Connect4Engine
+
+    incremental = DummyMinimaxMLP((43, 8, 4, 1))
+    incremental.max_depth = 4
+    full = DummyMinimaxMLP((43, 8, 4, 1), weights=incremental.parameters)
+    full.max_depth = 4
+    full.incremental = False
+
+    engine = Connect4Engine()
+    for move in (3, 3, 2, 4, 4):
+        assert incremental.run(engine.state) == full.run(engine.state)
+        assert np.isclose(incremental.best_score, full.best_score)
+        engine.play(move)
+
+
+def test_accumulator_state_pickle():
+    import pickle
+    from gamebot.ai.accumulator import AccumulatorState
+    from gamebot.games.connect4 import Connect4Engine
+
+    mmlp = DummyMinimaxMLP((43, 5, 1))
+    state = AccumulatorState(Connect4Engine().state, mmlp.mlp)
+    state.push(3)
+    copy = pickle.loads(pickle.dumps(state))
+    assert copy.player == state.player
+    assert np.allclose(copy.accumulator, state.accumulator)
+    assert mmlp.state_score(copy) == pytest.approx(mmlp.state_score(copy.state))
+
+
+def test_calibrate_precision():
+    from gamebot.games.connect4 import Connect4Engine
+
+    mmlp = DummyMinimaxMLP((43, 8, 4, 1))
+    mmlp.max_depth = 2
+    states = []
+    engine = Connect4Engine()
+    for move in (3, 3, 2, 4, 4, 1):
+        engine.play(move)
+        states.append(engine.state)
+
+    agreements = mmlp.calibrate_precision(states, min_agreement=0.8)
+    assert list(agreements) == ["int8", "int16", "float32"][:len(agreements)]
+    assert mmlp.precision == (list(agreements)[-1] if agreements[list(agreements)[-1]] >= 0.8 else "float64")
+
+    mmlp.precision = "int8"
+    full = DummyMinimaxMLP((43, 8, 4, 1), weights=mmlp.parameters)
+    full.max_depth, full.incremental, full.precision = 2, False, "int8"
+    for state in states:  # The accumulator uses the quantized weights too
+        assert mmlp.run(state) == full.run(state)
+        assert np.isclose(mmlp.best_score, full.best_score, rtol=1e-4)
+
+
+def test_fit_tablebase_values():
+    from gamebot.games.tictactoe import TictactoeEngine
+    from gamebot.games.tictactoe.tablebase import TictactoeTablebase
+
+    tablebase = TictactoeTablebase()
+    rng = np.random.default_rng(0)
+    states, targets = [], []
+    for _ in range(60):
+        engine = TictactoeEngine()
+        while not engine.is_over():
+            engine.play(int(rng.choice(engine.state.legal_moves())))
+            if not engine.is_over():
+                states.append(engine.state)
+                targets.append(-tablebase.value(engine.state))  # For the player who moved
+
+    mmlp = DummyMinimaxMLP((10, 16, 1))
+    mmlp.move_memo_size = 4
+    mmlp.run(states[0])
+    losses = mmlp.fit(states, targets, epochs=40, learning_rate=0.01, seed=0)
+    assert losses[-1] < losses[0] / 2
+    assert len(mmlp._move_memo) == 0
+    scores = np.array([mmlp.state_score(state) for state in states])
+    assert np.mean((scores - targets) ** 2) < losses[0] / 2
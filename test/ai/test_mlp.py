@@ -1,6 +1,9 @@
+from copy import deepcopy
+
+import numpy as np
 import pytest
 
-from gamebot.ai.mlp import MLP
+from gamebot.ai.mlp import MLP, StackedMLP
 
 
 def test_mpl_dummy1():
@@ -24,3 +27,109 @@ def test_mpl_dummy3():
     mlp.layers[1] = ([[0.46, 0.44]], [-0.3])
 
     assert mlp.forward_propagation([-0.45, 0.79]) == pytest.approx([-0.1941999])
+
+
+def test_stacked_mlp_matches_mlps():
+    mlps = [MLP((4, 3, 2, 1)) for _ in range(5)]
+    stacked = StackedMLP.from_mlps(mlps)
+    X = np.random.uniform(-1, 1, (6, 4))
+
+    outputs = stacked.forward_propagation_batch(X)
+    assert outputs.shape == (5, 6, 1)
+    for mlp, output in zip(mlps, outputs):
+        assert output == pytest.approx(mlp.forward_propagation_batch(X))
+
+    # A batch of inputs for each network, or one input each
+    inputs = np.random.uniform(-1, 1, (5, 6, 4))
+    outputs = stacked.forward_propagation_batch(inputs)
+    for mlp, X, output in zip(mlps, inputs, outputs):
+        assert output == pytest.approx(mlp.forward_propagation_batch(X))
+    outputs = stacked.forward_propagation(inputs[:, 0])
+    for mlp, X, output in zip(mlps, inputs[:, 0], outputs):
+        assert output == pytest.approx(mlp.forward_propagation(X))
+
+
+def test_stacked_mlp_parameters():
+    mlps = [MLP((4, 3, 1)) for _ in range(3)]
+    stacked = StackedMLP.from_mlps(mlps)
+
+    assert stacked.parameters.shape == (3, 19)
+    for mlp, params in zip(mlps, stacked.parameters):
+        assert np.all(params == mlp.parameters)
+    assert np.all(stacked[1].parameters == mlps[1].parameters)
+
+    stacked.parameters = stacked.parameters * 2
+    assert np.all(stacked[2].parameters == 2 * mlps[2].parameters)
+
+    with pytest.raises(ValueError):
+        StackedMLP.from_mlps([MLP((4, 3, 1)), MLP((4, 2, 1))])
+
+
+def test_mlp_parameter_buffer():
+    mlp = MLP((4, 3, 1))
+    assert all(np.shares_memory(weights, mlp._parameters) for weights, _ in mlp.layers)
+
+    mlp.layers[1] = ([[1, 2, 3]], [4])
+    assert np.all(mlp.parameters[-4:] == [1, 2, 3, 4])
+
+    copy = deepcopy(mlp)
+    copy.parameters = np.zeros(19)
+    assert np.all(copy.layers[0][0] == 0)
+    assert np.all(mlp.parameters[-4:] == [1, 2, 3, 4])
+
+
+def test_forward_propagation_accumulated():
+    for shape in ((4, 3, 2, 1), (4, 1)):
+        mlp = MLP(shape)
+        X = np.random.uniform(-1, 1, 4)
+        weights, biases = mlp.layers[0]
+        accumulator = np.dot(weights, X) + biases
+        assert mlp.forward_propagation_accumulated(accumulator) == pytest.approx(mlp.forward_propagation(X))
+
+
+def test_precisions():
+    mlp = MLP((43, 16, 8, 1))
+    X = np.random.choice([-1, 0, 1], (10, 43))
+    expected = mlp.forward_propagation_batch(X)
+
+    for precision, tolerance in (("float32", 1e-5), ("int16", 1e-3), ("int8", 0.1)):
+        mlp.set_precision(precision)
+        assert mlp.forward_propagation_batch(X) == pytest.approx(expected, rel=tolerance, abs=tolerance)
+        assert mlp.forward_propagation(X[0]) == pytest.approx(expected[0], rel=tolerance, abs=tolerance)
+    assert mlp._inference_layers[0][0].dtype == np.int8
+    assert deepcopy(mlp).precision == "int8"
+
+    mlp.layers[2] = (np.zeros((1, 8)), [1])  # The quantized weights follow the parameters
+    assert mlp.forward_propagation(X[0]) == pytest.approx([1])
+    mlp.set_precision("float64")
+    assert mlp._inference_layers is None
+
+    with pytest.raises(ValueError):
+        mlp.set_precision("float16")
+
+
+def test_gradients():
+    mlp = MLP((4, 6, 3, 1))
+    X, y = np.random.uniform(-1, 1, (8, 4)), np.random.uniform(-1, 1, 8)
+    loss, gradient = mlp.gradients(X, y)
+    assert loss == pytest.approx(np.mean((mlp.forward_propagation_batch(X)[:, 0] - y) ** 2))
+
+    parameters = mlp.parameters
+    for i in np.random.choice(len(parameters), 10, replace=False):
+        shifted = parameters.copy()
+        shifted[i] += 1e-6
+        mlp.parameters = shifted
+        assert (mlp.gradients(X, y)[0] - loss) / 1e-6 == pytest.approx(gradient[i], rel=1e-3, abs=1e-5)
+
+
+def test_fit():
+    X = np.random.choice([-1, 0, 1], (256, 10))
+    y = np.dot(X, np.linspace(-1, 1, 10)) / 3
+    for optimizer, learning_rate in (("sgd", 0.01), ("adam", 0.01)):
+        mlp = MLP((10, 16, 1))
+        losses = mlp.fit(X, y, epochs=30, learning_rate=learning_rate, optimizer=optimizer, seed=0)
+        assert losses[-1] < losses[0] / 10
+        assert mlp.gradients(X, y)[0] == pytest.approx(losses[-1], rel=0.5)
+
+    with pytest.raises(ValueError):
+        mlp.fit(X, y, optimizer="rmsprop")
@@ -0,0 +1,78 @@
+import threading
+
+from gamebot.ai import EndgameSolver
+from gamebot.games.connect4 import Connect4Engine
+from gamebot.games.tictactoe import TictactoeMinimax, TictactoeState
+
+
+def test_solve_tictactoe():
+    solver = EndgameSolver()
+    assert solver.solve(TictactoeState(None, 0, None))[0] == 0
+
+    # Player 0 wins by making two lines at once
+    board = [[1, -1, -1], [0, -1, -1], [0, 1, -1]]
+    state = TictactoeState(None, 0, board)
+    value, move = solver.solve(state)
+    assert value == 1
+    assert list(state) == list(TictactoeState(None, 0, board))
+    state.push(move)
+    assert solver.solve(state)[0] == -1
+
+
+def test_solve_matches_minimax():
+    boards = [
+        [[0, -1, -1], [-1, 1, -1], [-1, -1, -1]],
+        [[0, 1, -1], [-1, 1, -1], [-1, -1, -1]],
+        [[0, -1, -1], [-1, -1, -1], [-1, -1, 1]],
+    ]
+    solver = EndgameSolver()
+    bot = TictactoeMinimax()
+    bot.max_depth = 9
+    for board in boards:
+        state = TictactoeState(None, 0, board)
+        value, move = solver.solve(state)
+        bot.run(state)
+        assert value == (bot.best_score > 1e8) - (bot.best_score < -1e8)
+        state.push(move)
+        assert -solver.solve(state)[0] == value
+
+
+def test_solve_connect4():
+    import random
+    import numpy as np
+    from gamebot.games.connect4.training import Connect4MinimaxMLP
+
+    np.random.seed(0)
+    bot = Connect4MinimaxMLP((43, 5, 1))
+    bot.endgame_solver = None
+    solver = EndgameSolver()
+    rand = random.Random(1)
+    for _ in range(3):
+        state = Connect4Engine().state
+        while state.empty_cells > 10 or state.terminal_status() is not None:
+            if state.terminal_status() is not None:
+                state = Connect4Engine().state
+            state.push(rand.choice(state.legal_moves()))
+
+        value, move = solver.solve(state)
+        bot.max_depth = state.empty_cells
+        bot.run(state)
+        assert value == (bot.best_score > 1e8) - (bot.best_score < -1e8)
+
+    assert solver.solve(Connect4Engine().state, node_limit=1000) is None
+    stop = threading.Event()
+    stop.set()
+    assert solver.solve(Connect4Engine().state, stop_event=stop) is None
+
+
+def test_run_uses_solver():
+    state = TictactoeState(None, 0, [[1, -1, -1], [0, -1, -1], [0, 1, -1]])
+    bot = TictactoeMinimax()
+    bot.max_depth = 1
+    assert bot.run(state) == 1  # Too shallow to see the double threat of 4
+
+    bot.endgame_solver = EndgameSolver(max_empty_cells=5)
+    assert bot.run(state) == 4
+    assert bot.best_score == 1e9
+    assert bot.run(TictactoeState(None, 0, None)) in range(9)  # Too many empty cells
+    assert bot.best_score < 1e8
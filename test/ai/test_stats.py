@@ -0,0 +1,61 @@
+import json
+
+from gamebot.ai import SearchStats, TranspositionTable
+from gamebot.ai.stats import JsonLinesWriter
+from gamebot.games.tictactoe import TictactoeMinimax, TictactoeState
+
+
+def gen_bot():
+    bot = TictactoeMinimax()
+    bot.max_depth = 9
+    bot.stats = SearchStats()
+    return bot
+
+
+def test_stats_counters():
+    bot = gen_bot()
+    state = TictactoeState(None, 0, [[0, 1, -1], [-1, 1, -1], [-1, -1, -1]])
+    move = bot.run(state)
+
+    stats = bot.stats
+    assert move == 7
+    assert stats.nodes == bot.nodes
+    assert stats.nodes_per_ply[0] == 1
+    assert stats.nodes_per_ply[1] >= len(state.legal_moves())  # Some moves are searched again
+    assert stats.nodes_per_iteration == {9: bot.nodes}
+    assert stats.terminal_hits > 0
+    assert stats.leaf_evaluations == 0  # The whole tree is searched
+    assert stats.cutoffs == sum(stats.cutoff_indexes) > 0
+    assert stats.total_time >= stats.move_time + stats.terminal_time > 0
+    assert stats.effective_branching_factor > 1
+    assert list(state) == list(TictactoeState(None, 0, [[0, 1, -1], [-1, 1, -1], [-1, -1, -1]]))
+
+
+def test_stats_same_search():
+    state = TictactoeState(None, 0, None)
+    bot = gen_bot()
+    bot.transposition_table = TranspositionTable(2**16)
+    move = bot.run(state, node_budget=5000)
+    nodes, best_score = bot.nodes, bot.best_score
+    assert bot.stats.tt_hits >= bot.stats.tt_cutoffs > 0
+    assert bot.stats.leaf_evaluations > 0
+    assert len(bot.stats.nodes_per_iteration) == bot.depth_reached
+
+    bot.stats = None
+    bot.transposition_table = TranspositionTable(2**16)
+    assert bot.run(state, node_budget=5000) == move
+    assert (bot.nodes, bot.best_score) == (nodes, best_score)
+
+
+def test_json_lines_writer(tmp_path):
+    path = tmp_path / "stats.jsonl"
+    bot = gen_bot()
+    bot.stats.callback = JsonLinesWriter(path)
+    bot.max_depth = 2
+    bot.run(TictactoeState(None, 0, None))
+    bot.run(TictactoeState(None, 0, None))
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(lines) == 2
+    assert lines[0]["nodes"] == bot.nodes
+    assert lines[0]["nodes_per_ply"][:2] == [1, 9]
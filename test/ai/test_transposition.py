@@ -0,0 +1,58 @@
+from gamebot.ai import TranspositionTable
+from gamebot.ai.transposition import EXACT, LOWER, UPPER
+from gamebot.games.tictactoe import TictactoeMinimax, TictactoeState
+
+
+def test_store_probe():
+    tt = TranspositionTable(memory=1000)
+    assert len(tt) == 32
+
+    assert tt.probe(12345, 3) is None
+    tt.store(12345, 3, LOWER, -2.5, 4)
+    assert tt.probe(12345, 3) == (3, LOWER, -2.5, 4)
+    assert tt.probe(12345 + 32, 3) is None
+
+    tt.store(2**64 - 1, 0, UPPER, 1, None)
+    assert tt.probe(2**64 - 1, 0) == (0, UPPER, 1, None)
+
+
+def test_win_scores_relative_to_depth():
+    tt = TranspositionTable(memory=1000)
+    tt.store(7, 5, EXACT, 1e9 + 3, 1)
+    assert tt.probe(7, 4)[2] == 1e9 + 2
+    tt.store(8, 5, EXACT, -1e9 - 3, 1)
+    assert tt.probe(8, 7)[2] == -1e9 - 5
+
+
+def test_replacement():
+    tt = TranspositionTable(memory=1000)
+    tt.store(1, 5, EXACT, 1, 1)
+    tt.store(33, 2, EXACT, 2, 2)  # Same slot, shallower: ignored
+    assert tt.probe(1, 0) is not None
+    assert tt.probe(33, 0) is None
+
+    tt.new_search()
+    tt.store(33, 2, EXACT, 2, 2)  # Entries of a previous search are replaced
+    assert tt.probe(1, 0) is None
+    assert tt.probe(33, 0) == (2, EXACT, 2, 2)
+
+    tt.clear()
+    assert tt.probe(33, 0) is None
+
+
+def test_search_with_table():
+    boards = [
+        [[-1, -1, -1], [-1, -1, -1], [-1, -1, -1]],
+        [[0, 1, -1], [-1, 1, -1], [-1, -1, -1]],
+        [[0, -1, -1], [-1, 1, -1], [-1, -1, 0]],
+    ]
+    bot = TictactoeMinimax()
+    bot.max_depth = 9
+    cached_bot = TictactoeMinimax()
+    cached_bot.max_depth = 9
+    cached_bot.transposition_table = TranspositionTable(memory=2**16)
+
+    for board in boards:
+        for _ in range(2):  # The second search reuses the table of the first one
+            state = TictactoeState(None, 0, board)
+            assert cached_bot.run(state) == bot.run(state)
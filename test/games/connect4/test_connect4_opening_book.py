@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from gamebot.games.connect4 import Connect4Engine
+from gamebot.games.connect4.opening_book import Connect4OpeningBook, build, canonical_key
+from gamebot.games.connect4.training import Connect4MinimaxMLP
+
+
+def gen_bot():
+    np.random.seed(3)
+    bot = Connect4MinimaxMLP((43, 5, 1))
+    bot.max_depth = 3
+    return bot
+
+
+def play(moves):
+    state = Connect4Engine().state
+    for move in moves:
+        state.push(move)
+    return state
+
+
+def test_canonical_key():
+    key, mirrored = canonical_key(play([6, 3]))
+    assert mirrored
+    assert (key, False) == canonical_key(play([0, 3]))
+    assert canonical_key(play([3, 3]))[0] != canonical_key(play([3, 2]))[0]
+    assert canonical_key(play([3, 2, 3]))[0] != canonical_key(play([3, 3, 2]))[0]  # Other colours
+
+
+@pytest.fixture(scope="module")
+def book_path(tmp_path_factory):
+    path = tmp_path_factory.mktemp("book") / "book.bin"
+    build(gen_bot(), path, plies=2)
+    return path
+
+
+def test_book_matches_search(book_path):
+    book = Connect4OpeningBook(book_path)
+    bot = gen_bot()
+
+    assert len(book) == 1 + 4 + 25  # Positions after 0, 1 and 2 moves, up to a mirror
+    for moves in ([], [0], [6], [1, 5], [5, 1], [3, 3]):
+        state = play(moves)
+        score, move = book.probe(state)
+        # The mirror images share the result of the one with the smallest key
+        if canonical_key(state)[1]:
+            assert 6 - move == bot.run(play([6 - m for m in moves]))
+        else:
+            assert move == bot.run(state)
+        assert score == pytest.approx(bot.best_score, rel=1e-6)
+    assert book.probe(play([3, 3, 3])) is None
+
+    bot.opening_book = book
+    assert bot.run(play([6])) == book.probe(play([6]))[1]
+    assert bot.nodes == 0
+
+
+def test_build_resume(tmp_path, book_path):
+    path = tmp_path / "book.bin"
+    journal = tmp_path / "book.bin.journal"
+    # A journal cut in the middle of its sixth record
+    book = Connect4OpeningBook(book_path)
+    done = np.zeros(5, dtype=[("key", "<u8"), ("score", "<f4"), ("move", "i1")])
+    for i in range(5):
+        done[i] = (book._keys[i], book._scores[i], book._moves[i])
+    journal.write_bytes(done.tobytes() + b"\x01\x02\x03")
+
+    bot = gen_bot()
+    runs = []
+    run = bot.run
+    bot.run = lambda state: runs.append(state) or run(state)
+    build(bot, path, plies=2)
+
+    assert len(runs) == len(book) - 5
+    assert not journal.exists()
+    assert path.read_bytes() == book_path.read_bytes()
+
+
+def test_build_parallel(tmp_path, book_path):
+    path = tmp_path / "book.bin"
+    build(gen_bot(), path, plies=2, processes=2)
+    assert path.read_bytes() == book_path.read_bytes()
@@ -0,0 +1,199 @@
+import numpy as np
+
+from gamebot.games.connect4 import Connect4Engine, Connect4State
+
+
+def gen_state(rows, player=0):
+    """Build a state from a list of strings, top row first. '.' is empty, '0' and '1' are players."""
+    board = np.array([[-1 if c == "." else int(c) for c in row] for row in rows])
+    return Connect4State(None, player, board)
+
+
+EMPTY = ["......."] * 6
+
+
+def test_iter_empty_board():
+    state = gen_state(EMPTY)
+    assert list(state) == [0] + [-1] * 42
+
+
+def test_iter_matches_board():
+    rows = [".......",
+            ".......",
+            "...1...",
+            "...0...",
+            "..10...",
+            "0.01..1"]
+    state = gen_state(rows, player=1)
+    expected = [-1 if c == "." else int(c) for row in rows for c in row]
+    assert list(state) == [1] + expected
+
+
+def test_possible_next_states_empty_board():
+    state = gen_state(EMPTY)
+    moves = [s.last_move for s in state.possible_next_states()]
+    assert moves == list(range(7))
+
+
+def test_possible_next_states_full_column():
+    rows = ["0......",
+            "1......",
+            "0......",
+            "1......",
+            "0......",
+            "1......"]
+    state = gen_state(rows)
+    moves = [s.last_move for s in state.possible_next_states()]
+    assert moves == list(range(1, 7))
+
+
+def test_next_state_drops_piece():
+    state = gen_state(EMPTY)
+    child = next(state.possible_next_states())
+    board = list(child)[1:]
+    assert child.player == 1
+    assert board[35] == 0  # Bottom left cell
+    assert board.count(-1) == 41
+
+
+def test_has_won_horizontal():
+    state = gen_state(["......."] * 5 + [".0000.."])
+    assert state.has_won(0)
+    assert not state.has_won(1)
+
+
+def test_has_won_vertical():
+    state = gen_state(["......."] * 2 + ["1......"] * 4, player=1)
+    assert state.has_won(1)
+    assert not state.has_won(0)
+
+
+def test_has_won_diagonals():
+    rows = [".......",
+            ".......",
+            "...0..1",
+            "..01.1.",
+            ".0.11..",
+            "0..11.."]
+    state = gen_state(rows)
+    assert state.has_won(0)
+    assert state.has_won(1)
+
+
+def test_has_not_won_wrapping_column():
+    # Stones at the top of a column and the bottom of the next one are not aligned
+    rows = ["0......",
+            "0......",
+            "1......",
+            "1......",
+            "11.....",
+            "01....."]
+    state = gen_state(rows)
+    assert not state.has_won(0)
+    assert not state.has_won(1)
+
+
+def test_is_tie():
+    rows = ["0101010",
+            "0101010",
+            "1010101",
+            "1010101",
+            "0101010",
+            "0101010"]
+    state = gen_state(rows)
+    assert state.is_tie()
+    assert not gen_state(EMPTY).is_tie()
+
+
+def test_eq_and_hash():
+    first = next(gen_state(EMPTY).possible_next_states())
+    second = gen_state(["......."] * 5 + ["0......"], player=1)
+    assert first == second
+    assert hash(first) == hash(second)
+    assert first != gen_state(["......."] * 5 + ["0......"], player=0)
+
+
+def test_engine_game():
+    engine = Connect4Engine()
+    for move in [3, 3, 4, 4, 5, 5]:
+        assert engine.play(move)
+        assert not engine.is_over()
+    assert engine.play(6)
+    assert engine.get_winner() == 0
+    assert list(engine.state)[1:] == list(engine.board.ravel())
+
+
+def test_has_won_incremental_matches_full_board():
+    rng = np.random.default_rng(42)
+    for _ in range(50):
+        state = gen_state(EMPTY)
+        while not state.is_tie():
+            state = rng.choice(list(state.possible_next_states()))
+            board = np.array(list(state)[1:]).reshape(6, 7)
+            rebuilt = Connect4State(state.last_move, state.player, board)
+            assert state.position_key == rebuilt.position_key
+            assert state.has_won(0) == rebuilt.has_won(0)
+            assert state.has_won(1) == rebuilt.has_won(1)
+            if state.has_won(0) or state.has_won(1):
+                break
+
+
+def test_has_won_kept_in_children():
+    state = gen_state(["......."] * 5 + [".0000.."], player=1)
+    for child in state.possible_next_states():
+        assert child.has_won(0)
+        assert not child.has_won(1)
+
+
+def test_push_pop_matches_next_states():
+    rng = np.random.default_rng(7)
+    state = gen_state(EMPTY)
+    for _ in range(20):
+        before = list(state)
+        children = {s.last_move: s for s in state.possible_next_states()}
+        assert state.legal_moves() == list(children)
+        for move, child in children.items():
+            state.push(move)
+            assert state == child
+            assert state.position_key == child.position_key
+            assert list(state) == list(child)
+            assert state.last_move == move
+            assert state.has_won(0) == child.has_won(0) and state.has_won(1) == child.has_won(1)
+            state.pop()
+            assert list(state) == before
+        state.push(int(rng.choice(state.legal_moves())))
+
+
+def test_terminal_status():
+    assert gen_state(EMPTY).terminal_status() is None
+    assert gen_state(["......."] * 5 + [".0000.."], player=1).terminal_status() == 0
+    assert gen_state(["......."] * 2 + ["1......"] * 4).terminal_status() == 1
+    tie = ["0101010",
+           "0101010",
+           "1010101",
+           "1010101",
+           "0101010",
+           "0101010"]
+    assert gen_state(tie).terminal_status() == -1
+
+
+def test_terminal_status_push_pop():
+    state = gen_state(["......."] * 3 + ["0......", "0......", "0111..."])
+    assert state.terminal_status() is None
+    state.push(4)
+    assert state.terminal_status() is None
+    state.pop()
+    state.push(0)
+    assert state.terminal_status() == 0
+    state.pop()
+    assert state.terminal_status() is None
+
+
+def test_feature_changes():
+    state = Connect4Engine().state
+    for move in [3, 3, 2, 4, 4, 1, 6, 6]:
+        features = list(state)
+        for index, delta in state.feature_changes(move):
+            features[index] += delta
+        state.push(move)
+        assert list(state) == features
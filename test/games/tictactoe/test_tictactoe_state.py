@@ -121,3 +121,70 @@ def test_next_player_0():
 def test_next_player_1():
     state = TictactoeState(None, 1, None)
     assert state.next_player == 0
+
+
+def test_iter():
+    state = gen_state([[0, 1, -1], [-1, 1, -1], [0, -1, -1]])
+    assert list(state) == [0, 0, 1, -1, -1, 1, -1, 0, -1, -1]
+
+
+def test_next_state_iter():
+    state = gen_state([[0, 1, -1], [-1, 1, -1], [0, -1, -1]])
+    child = next(state.possible_next_states())
+    assert child.last_move == 2
+    assert list(child) == [1, 0, 1, 0, -1, 1, -1, 0, -1, -1]
+
+
+def test_eq_and_hash():
+    state = gen_state([[0, 1, -1], [-1, -1, -1], [-1, -1, -1]])
+    same = gen_state([[0, 1, -1], [-1, -1, -1], [-1, -1, -1]])
+    children = list(gen_state([[0, -1, -1], [-1, -1, -1], [-1, -1, -1]]).possible_next_states())
+    assert state == same
+    assert hash(state) == hash(same)
+    assert state != children[0]
+    assert TictactoeState(None, 1, [[0, 1, -1], [-1, -1, -1], [-1, -1, -1]]) != state
+
+
+def test_push_pop():
+    state = gen_state([[0, 1, -1], [-1, 1, -1], [0, -1, -1]])
+    before = list(state)
+    assert state.legal_moves() == [2, 3, 5, 7, 8]
+
+    state.push(3)
+    assert state.has_won(0)
+    assert state.player == 1
+    assert state.last_move == 3
+    assert state.legal_moves() == [2, 5, 7, 8]
+    state.push(7)
+    assert state.has_won(1)
+    state.pop()
+    state.pop()
+
+    assert list(state) == before
+    assert state.last_move is None
+    assert not state.has_won(0)
+
+
+def test_terminal_status():
+    assert gen_state([[-1 for _ in range(3)] for _ in range(3)]).terminal_status() is None
+    assert gen_state([[0, 1, 0], [1, 0, 1], [1, 0, 1]]).terminal_status() == -1
+    assert gen_state([[-1, -1, 1], [-1, 1, -1], [1, -1, 0]]).terminal_status() == 1
+
+    state = gen_state([[0, 0, -1], [1, 1, -1], [-1, -1, -1]])
+    assert state.terminal_status() is None
+    child = [s for s in state.possible_next_states() if s.last_move == 2][0]
+    assert child.terminal_status() == 0
+    state.push(2)
+    assert state.terminal_status() == 0
+    state.pop()
+    assert state.terminal_status() is None
+
+
+def test_feature_changes():
+    state = gen_state([[-1 for _ in range(3)] for _ in range(3)])
+    for cell in [4, 0, 8, 2, 6]:
+        features = list(state)
+        for index, delta in state.feature_changes(cell):
+            features[index] += delta
+        state.push(cell)
+        assert list(state) == features
@@ -0,0 +1,78 @@
+import random
+
+import pytest
+
+from gamebot.ai import EndgameSolver
+from gamebot.games.tictactoe import TictactoeEngine, TictactoeMinimax, TictactoeState
+from gamebot.games.tictactoe.tablebase import TictactoeTablebase, generate
+
+
+@pytest.fixture(scope="module")
+def tablebase():
+    return TictactoeTablebase()
+
+
+def test_values_match_solver(tablebase):
+    solver = EndgameSolver()
+    rand = random.Random(0)
+    for _ in range(300):
+        state = TictactoeState(None, rand.randrange(2), None)
+        for _ in range(rand.randrange(8)):
+            if state.terminal_status() is not None:
+                break
+            state.push(rand.choice(state.legal_moves()))
+        if state.terminal_status() is not None:
+            assert tablebase.probe(state) is None
+            continue
+
+        value, _ = solver.solve(state)
+        assert tablebase.value(state) == value
+        distance = tablebase.distance(state)
+        for move in tablebase.best_moves(state):
+            state.push(move)
+            assert tablebase.value(state) == -value
+            assert tablebase.distance(state) == distance - 1
+            state.pop()
+
+
+def test_best_moves(tablebase):
+    state = TictactoeState(None, 0, None)
+    assert tablebase.value(state) == 0
+    assert tablebase.distance(state) == 9
+    assert tablebase.best_moves(state) == list(range(9))
+
+    # Winning now is faster than with the double threat
+    state = TictactoeState(None, 0, [[0, 0, -1], [1, 1, -1], [-1, -1, -1]])
+    assert tablebase.probe(state) == (1, 2)
+    assert tablebase.distance(state) == 1
+
+    state = TictactoeState(None, 1, [[0, -1, -1], [-1, 1, -1], [-1, -1, 0]])
+    assert tablebase.value(state) == 0
+    assert tablebase.best_moves(state) == [1, 3, 5, 7]
+
+
+def test_generate(tmp_path, tablebase):
+    path = tmp_path / "tablebase.bin"
+    state = TictactoeState(None, 1, [[0, -1, -1], [-1, -1, -1], [-1, -1, -1]])
+
+    generated = TictactoeTablebase(path)
+
+    assert path.exists()
+    assert generated.probe(state) == tablebase.probe(state)
+    path.write_bytes(b"something else")
+    with pytest.raises(ValueError):
+        TictactoeTablebase(path)
+    generate(path)
+    assert TictactoeTablebase(path).best_moves(state) == [4]
+
+
+def test_perfect_play(tablebase):
+    bot = TictactoeMinimax()
+    bot.tablebase = tablebase
+    engine = TictactoeEngine()
+    while not engine.is_over():
+        move = bot.run(engine.state)
+        assert bot.best_score == 0
+        engine.play(move)
+
+    assert engine.get_winner() == -1
@@ -0,0 +1,51 @@
+import threading
+
+from gamebot.games.tictactoe import TictactoeEngine, TictactoeMinimax
+from gamebot.interface.tictactoe_cli import TictactoeCLI
+
+
+class BotCLI(TictactoeCLI):
+    def __init__(self):
+        self.engine = TictactoeEngine()
+        self.bot = TictactoeMinimax()
+        self.bot.max_depth = 9
+        self._bot_players = [1]
+
+
+def test_stop_event():
+    bot = TictactoeMinimax()
+    bot.max_depth = 9
+    bot.stop_event = threading.Event()
+    bot.stop_event.set()
+
+    assert bot.run(TictactoeEngine().state) is None
+    assert bot.run(TictactoeEngine().state, node_budget=10**6) is not None  # The first depth is completed
+
+
+def test_pondered_move_is_played(monkeypatch):
+    cli = BotCLI()
+    monkeypatch.setattr("builtins.input", lambda _: "1 1")
+    cli._start_pondering()
+    cli._ponder_thread.join()
+    assert len(cli._pondered) == 9
+
+    expected = {reply: move for reply, (move, _) in cli._pondered.items()}
+    cli._ask_human_move()
+    cli._stop_pondering()
+    monkeypatch.setattr(cli.bot, "run", None)  # The bot should not search again
+    cli._bot_play()
+
+    assert cli.engine.state.last_move == expected[TictactoeEngine().state._play(4)]
+
+
+def test_pondering_stops_with_the_human_move(monkeypatch):
+    cli = BotCLI()
+    cli.bot.max_depth = 30
+    cli.bot.time_budget = 60
+    monkeypatch.setattr("builtins.input", lambda _: "0 0")
+
+    cli._human_play()
+
+    assert cli._ponder_thread is None
+    assert cli.bot.stop_event is None
+    assert cli.engine.state.last_move == 0